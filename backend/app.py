@@ -1,38 +1,48 @@
-from flask import Flask, request, jsonify, send_file, redirect, session, url_for, after_this_request
+from flask import Flask, request, jsonify, send_file, redirect, session
 from flask_cors import CORS
 import os
 import logging
+import logging.handlers
+import queue
+import atexit
 from datetime import datetime, timedelta
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import tempfile
+import shutil
 import threading
 import time
-from pathlib import Path
 from dotenv import load_dotenv
 import google.oauth2.credentials
-import google_auth_oauthlib.flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 import json
-from urllib.parse import urlencode
+from urllib.parse import urlencode, quote, urlsplit, parse_qs, parse_qsl
 import secrets
 import hashlib
-from functools import wraps
+import importlib.util
+from functools import lru_cache, wraps
+import itertools
+from collections import OrderedDict
 import random
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import sys
 import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 
 # Load environment variables
 load_dotenv()
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Setup logging: records are queued by the calling thread and written to
+# stderr by a listener thread, so request/download threads never block on I/O
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(message)s', handlers=[logging.handlers.QueueHandler(_log_queue)])
 logger = logging.getLogger(__name__)
 logger.info(f"RENDER_EXTERNAL_URL at startup: {os.getenv('RENDER_EXTERNAL_URL')}")
 
@@ -119,6 +129,70 @@ SCOPES = [
 DOWNLOAD_DIR = os.getenv('DOWNLOAD_DIR', os.path.join(os.path.dirname(__file__), 'downloads'))
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 
+# Files fetched directly over HTTP are written in large chunks to keep write syscalls few
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Initial download buffer for yt-dlp (its default is 1 KiB). A larger buffer lets it absorb
+# slow-disk stalls instead of issuing many tiny writes. Accepts yt-dlp sizes such as 512K or 4M.
+YTDLP_BUFFER_SIZE = os.getenv('YTDLP_BUFFER_SIZE', '1M')
+
+# Fragments of DASH/HLS streams fetched in parallel (yt-dlp -N), and the range size used to
+# split plain HTTP downloads so throttled servers don't cap a single long-lived request.
+YTDLP_CONCURRENT_FRAGMENTS = os.getenv('YTDLP_CONCURRENT_FRAGMENTS', '8')
+YTDLP_HTTP_CHUNK_SIZE = os.getenv('YTDLP_HTTP_CHUNK_SIZE', '10M')
+
+# When aria2c is installed, yt-dlp hands progressive (single-file HTTP) downloads to it so each
+# file is fetched as this many parallel Range requests. DASH/HLS keep yt-dlp's native fragments.
+YTDLP_RANGE_CONNECTIONS = int(os.getenv('YTDLP_RANGE_CONNECTIONS', 4))
+ARIA2C_PATH = shutil.which('aria2c')
+
+# Persistent yt-dlp cache (YouTube player JS, signature/nsig solutions). Kept next to the
+# downloads so it survives restarts on Render's persistent disk instead of living in ~/.cache.
+YTDLP_CACHE_DIR = os.getenv('YTDLP_CACHE_DIR', os.path.join(DOWNLOAD_DIR, '.ytdlp_cache'))
+os.makedirs(YTDLP_CACHE_DIR, exist_ok=True)
+
+# On-disk cache of anonymous analysis results, keyed by platform and video ID, so repeat
+# lookups of a recently seen video skip the API/yt-dlp probing. Results carry direct stream
+# URLs that expire after a few hours, so the TTL is kept well below that.
+INFO_CACHE_DIR = os.getenv('INFO_CACHE_DIR', os.path.join(DOWNLOAD_DIR, '.info_cache'))
+INFO_CACHE_TTL = int(os.getenv('INFO_CACHE_TTL', 3600))
+INFO_CACHE_MAX_ENTRIES = int(os.getenv('INFO_CACHE_MAX_ENTRIES', 5000))
+# Most recently used results are also kept in memory per worker, saving the file read and JSON parse
+INFO_MEMORY_CACHE_SIZE = int(os.getenv('INFO_MEMORY_CACHE_SIZE', 256))
+os.makedirs(INFO_CACHE_DIR, exist_ok=True)
+
+# Playlist analysis: how many entries to list, how many of the first ones are fully analyzed
+# when enriching (the rest are analyzed one at a time through /api/analyze), and how many
+# per-video lookups to run at once
+PLAYLIST_MAX_ENTRIES = int(os.getenv('PLAYLIST_MAX_ENTRIES', 100))
+PLAYLIST_ENRICH_MAX = int(os.getenv('PLAYLIST_ENRICH_MAX', 10))
+PLAYLIST_INFO_WORKERS = int(os.getenv('PLAYLIST_INFO_WORKERS', 10))
+
+# Batch downloads: most URLs accepted per request, how many are downloaded at once, and how
+# long a batch may take in total. One wave of downloads and the deadline keep a batch inside
+# gunicorn's 120s worker timeout; downloads still running at the deadline are stopped.
+BATCH_MAX_URLS = int(os.getenv('BATCH_MAX_URLS', 4))
+BATCH_DOWNLOAD_WORKERS = int(os.getenv('BATCH_DOWNLOAD_WORKERS', 4))
+BATCH_TIMEOUT = int(os.getenv('BATCH_TIMEOUT', 100))
+
+# download_batch sets `at` on its worker threads: the time.monotonic() by which their downloads
+# must have ended. Subprocess timeouts on those threads are cut short to it, so yt-dlp and
+# ffmpeg are killed at the deadline instead of outliving the request.
+_batch_deadline = threading.local()
+
+def _time_left(timeout):
+    """`timeout` in seconds (None for no limit), cut short to what is left of the calling thread's batch deadline"""
+    deadline = getattr(_batch_deadline, 'at', None)
+    if deadline is None:
+        return timeout
+    left = max(0.0, deadline - time.monotonic())
+    return left if timeout is None else min(timeout, left)
+
+# At most this many MP3 encodes run at once, one per CPU by default. Audio downloads from any
+# number of request threads proceed in parallel, but the CPU-bound encodes queue for a free
+# slot instead of all competing for the same cores at once.
+FFMPEG_MAX_JOBS = int(os.getenv('FFMPEG_MAX_JOBS', os.cpu_count() or 1))
+
 # Shared account credentials storage
 SHARED_CREDENTIALS_FILE = os.path.join(DOWNLOAD_DIR, '.shared_credentials.json')
 
@@ -148,6 +222,8 @@ class SpotifyRateLimitTracker:
     def __init__(self, limit_per_day=20):
         self.limit_per_day = limit_per_day
         self.rate_limit_file = os.path.join(DOWNLOAD_DIR, '.spotify_rate_limit.txt')
+        # Requests are served from several threads per worker, so the read-modify-write below is serialized
+        self._lock = threading.Lock()
         self.load_state()
     
     def load_state(self):
@@ -161,7 +237,7 @@ class SpotifyRateLimitTracker:
                         self.download_count = int(lines[1])
                         
                         # Check if we need to reset (new day)
-                        today = datetime.now().strftime('%Y-%m-%d')
+                        today = time.strftime('%Y-%m-%d')
                         if self.last_reset_date != today:
                             self.download_count = 0
                             self.last_reset_date = today
@@ -176,7 +252,7 @@ class SpotifyRateLimitTracker:
     
     def reset(self):
         """Reset rate limit for new day"""
-        self.last_reset_date = datetime.now().strftime('%Y-%m-%d')
+        self.last_reset_date = time.strftime('%Y-%m-%d')
         self.download_count = 0
         self.save_state()
     
@@ -190,22 +266,189 @@ class SpotifyRateLimitTracker:
     
     def increment_and_check(self):
         """Increment download count and return (is_at_limit, remaining_downloads)"""
-        self.load_state()  # Refresh state
-        self.download_count += 1
-        self.save_state()
+        with self._lock:
+            self.load_state()  # Refresh state
+            self.download_count += 1
+            self.save_state()
+            download_count = self.download_count
         
-        remaining = max(0, self.limit_per_day - self.download_count)
-        is_at_limit = self.download_count >= self.limit_per_day
+        remaining = max(0, self.limit_per_day - download_count)
+        is_at_limit = download_count >= self.limit_per_day
         
         return is_at_limit, remaining
 
 spotify_rate_limiter = SpotifyRateLimitTracker(limit_per_day=20)
 
+# Platform by registered domain. Matching the hostname (rather than searching the whole URL)
+# means subdomains like m.youtube.com match, while netflix.com or a path containing
+# "youtube.com" do not.
+_PLATFORM_HOSTS = {
+    'youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'youtube-nocookie.com': 'youtube',
+    'tiktok.com': 'tiktok',
+    'instagram.com': 'instagram',
+    'twitter.com': 'twitter',
+    'x.com': 'twitter',
+    'spotify.com': 'spotify',
+}
+
+def _split_url(url):
+    """urlsplit, reading scheme-less links like youtube.com/watch?v=ID as https URLs so the host is found"""
+    if '//' not in url:
+        url = f'https://{url}'
+    return urlsplit(url)
+
+@lru_cache(maxsize=4096)
+def _detect_platform(url):
+    """Map a URL to its platform name. Cached because the same URL is checked on both the info and download paths."""
+    try:
+        host = (_split_url(url).hostname or '').rstrip('.')
+    except ValueError:
+        return 'generic'
+    # Look up the hostname and each parent domain: m.youtube.com, then youtube.com, then com
+    while host:
+        platform = _PLATFORM_HOSTS.get(host)
+        if platform:
+            return platform
+        host = host.partition('.')[2]
+    return 'generic'
+
+# youtube.com paths that carry the video ID as their second segment
+_YOUTUBE_ID_PATHS = frozenset(('shorts', 'embed', 'v', 'e', 'live'))
+
+@lru_cache(maxsize=4096)
+def _extract_video_id(url):
+    """
+    Extract a YouTube video ID from a URL: youtu.be/ID, ?v=ID, or /shorts|embed|v|live/ID on
+    youtube.com and youtube-nocookie.com. Cached for the same reason as _detect_platform.
+    """
+    try:
+        parsed_url = _split_url(url)
+        host = (parsed_url.hostname or '').rstrip('.')
+
+        if host == 'youtu.be':
+            return parsed_url.path.lstrip('/').split('/', 1)[0] or None
+
+        if host in ('youtube.com', 'youtube-nocookie.com') or host.endswith(('.youtube.com', '.youtube-nocookie.com')):
+            video_id = parse_qs(parsed_url.query).get('v', [None])[0]
+            if video_id:
+                return video_id
+            parts = parsed_url.path.split('/')
+            if len(parts) > 2 and parts[1] in _YOUTUBE_ID_PATHS:
+                return parts[2] or None
+
+        return None
+    except Exception as e:
+        logger.error(f"Error extracting video ID: {e}")
+        return None
+
+# Share-tracking query parameters that never change which media a link points to
+_TRACKING_PARAMS = frozenset((
+    'si', 'feature', 'pp', 'igsh', 'igshid', 'fbclid', 'gclid', 'ref_src',
+    'is_from_webapp', 'sender_device', 'sender_web_id', '_r', '_t',
+))
+_PLATFORM_TRACKING_PARAMS = {'twitter': frozenset(('s', 't'))}
+
+@lru_cache(maxsize=4096)
+def _canonical_url(url):
+    """
+    Normalize a media URL so share-link variants compare equal: https, lowercase host without
+    www./m., no trailing slash or fragment, tracking parameters dropped, the rest sorted.
+    """
+    try:
+        parts = _split_url(url.strip())
+    except ValueError:
+        return url
+    host = (parts.hostname or '').removeprefix('www.').removeprefix('m.')
+    extra = _PLATFORM_TRACKING_PARAMS.get(_detect_platform(url), frozenset())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in _TRACKING_PARAMS and key not in extra and not key.startswith('utm_')
+    )
+    canonical = f"https://{host}{parts.path.rstrip('/')}"
+    return f"{canonical}?{urlencode(query)}" if query else canonical
+
+def _reserve_space(f, content_length):
+    """Allocate a file's expected size up front so it is laid out in one extent, where supported"""
+    if not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        size = int(content_length)
+        if size > 0:
+            os.posix_fallocate(f.fileno(), 0, size)
+    except (TypeError, ValueError, OSError):
+        pass
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# The "__<quality>" suffix our output templates append, and characters not allowed in filenames
+_OUTPUT_SUFFIX_RE = re.compile(r'__\w+$')
+_UNSAFE_FILENAME_RE = re.compile(r'[<>:"/\\|?*]')
+
+# Static parts of the yt-dlp command line, built once rather than on every call
+_YT_DLP_BASE_ARGS = ('yt-dlp', '--no-warnings', '--geo-bypass', '--cache-dir', YTDLP_CACHE_DIR)
+_YOUTUBE_PLAYER_CLIENTS = ('android', 'ios', 'web', 'mweb', 'tv')
+_USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+# Rotated round-robin; the argument pairs are built once so each command just takes the next one
+_PLAYER_CLIENT_ARGS = itertools.cycle([
+    (client, ('--extractor-args', f'youtube:player_client={client}')) for client in _YOUTUBE_PLAYER_CLIENTS
+])
+_USER_AGENT_ARGS = itertools.cycle([('--user-agent', ua) for ua in _USER_AGENTS])
+_COOKIE_BROWSERS = ('chrome', 'firefox', 'edge', 'brave', 'vivaldi', 'chromium')
+
+# yt-dlp format selectors for each quality the frontend can request
+_QUALITY_FORMATS = {
+    '2160': 'bv[height<=2160]+ba/b[height<=2160]/bv+ba/b',
+    '1440': 'bv[height<=1440]+ba/b[height<=1440]/bv+ba/b',
+    '1080': 'bv[height<=1080]+ba/b[height<=1080]/bv+ba/b',
+    '720': 'bv[height<=720]+ba/b[height<=720]/bv+ba/b',
+    '480': 'bv[height<=480]+ba/b[height<=480]/bv+ba/b',
+    '360': 'bv[height<=360]+ba/b[height<=360]/bv+ba/b',
+    'mp4': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+    'webm': 'bestvideo[ext=webm]+bestaudio[ext=webm]/best[ext=webm]/best',
+    'best': 'bestvideo+bestaudio/best',
+}
+# Failing Invidious instances are skipped for an exponentially growing, jittered cooldown
+_INSTANCE_BACKOFF_BASE = 1.0
+_INSTANCE_BACKOFF_MAX = 300.0
+# Assumed response time for instances that have not answered yet, so untried ones rank mid-pack
+_INSTANCE_DEFAULT_LATENCY = 1.0
+# Liveness probes (HEAD /api/v1/stats) are cheap and cached, so a dead instance costs one
+# short probe per TTL instead of a full request timeout on every lookup
+_INSTANCE_PROBE_TIMEOUT = 2
+_INSTANCE_PROBE_TTL = 60
+
+# Invidious lookups race up to this many instances at once. The width adapts AIMD-style:
+# +0.5 per success, halved on an overload response or timeout, never below 1.
+_INVIDIOUS_RACE_MAX = 4
+
+def _backoff(attempt):
+    """Cooldown in seconds after `attempt` consecutive failures (0-based), with +/-50% jitter"""
+    return min(_INSTANCE_BACKOFF_MAX, _INSTANCE_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+def _retry_after(response):
+    """Seconds from a Retry-After header given in seconds, or None"""
+    try:
+        return min(_INSTANCE_BACKOFF_MAX, max(0.0, float(response.headers['Retry-After'])))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+_AUDIO_DOWNLOAD_ARGS = ('-f', 'bestaudio')
+_MP3_ENCODE_ARGS = ('-vn', '-c:a', 'libmp3lame', '-b:a', '192k')
+
 class InvidiousDownloader:
     """Download videos using Invidious API (free, no rate limits)"""
     
     def __init__(self, base_dir=None):
         self.base_dir = base_dir or tempfile.gettempdir()
+        # yt-dlp writes fragments and .part files here and moves the finished file into base_dir.
+        # Keeping it inside base_dir guarantees the same filesystem, so that move is a rename.
+        self.temp_dir = os.path.join(self.base_dir, '.partial')
         self.ensure_directories()
         
         # Invidious instances (fallback list)
@@ -217,44 +460,215 @@ class InvidiousDownloader:
             'https://inv.perditum.com'
         ]
         self.api_instance = os.getenv('INVIDIOUS_INSTANCE', self.invidious_instances[0])
+
+        # Piped API instances, queried together as a metadata fallback (comma-separated override)
+        self.piped_instances = [
+            instance.strip().rstrip('/')
+            for instance in os.getenv('PIPED_INSTANCES', 'https://pipedapi.kavin.rocks,https://pipedapi.adminforge.de').split(',')
+            if instance.strip()
+        ]
+
+        # Per-instance consecutive failure counts and the monotonic time until which each is skipped
+        self._instance_failures = {}
+        self._instance_cooldown = {}
+        self._instance_latency = {}  # EWMA of response time in seconds
+        self._instance_health = {}  # instance -> (alive, monotonic time of last probe)
+        self._instance_lock = threading.Lock()
+        self._race_width = 2.0
+        self._race_pool = ThreadPoolExecutor(max_workers=_INVIDIOUS_RACE_MAX * 4, thread_name_prefix='invidious')
+
+        # One pooled HTTP session for all API calls, so repeat requests to the same host reuse
+        # the TCP/TLS connection. Connect failures get one quick retry; reads are never retried.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                              max_retries=Retry(total=1, read=False, backoff_factor=0.2))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Every running ffmpeg holds one slot, whether it encodes a downloaded file or a stream
+        self._encode_slots = threading.BoundedSemaphore(FFMPEG_MAX_JOBS)
+
+        self._info_memo = OrderedDict()
+        self._info_memo_lock = threading.Lock()
+
+        # In-flight anonymous info lookups by cache key, so concurrent requests for one video share a single extraction
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
     
     def ensure_directories(self):
         os.makedirs(self.base_dir, exist_ok=True)
+        os.makedirs(self.temp_dir, exist_ok=True)
     
     def _get_yt_dlp_base_cmd(self, user_credentials=None, platform='generic', browser_for_cookies=None):
         """Constructs the base command for yt-dlp, handling authentication."""
-        cmd = ['yt-dlp', '--no-warnings', '--geo-bypass']
+        cmd = list(_YT_DLP_BASE_ARGS)
 
         # For YouTube, add extractor args to avoid blocking on servers
         if platform == 'youtube':
             # Rotate player client to increase reliability against bot detection.
-            player_clients = ['android', 'ios', 'web', 'mweb', 'tv']
-            selected_client = random.choice(player_clients)
-            logger.info(f"Using '{selected_client}' player client for YouTube to improve reliability.")
-            cmd.extend(['--extractor-args', f'youtube:player_client={selected_client}'])
+            selected_client, client_args = next(_PLAYER_CLIENT_ARGS)
+            logger.debug("Using '%s' player client for YouTube to improve reliability.", selected_client)
+            cmd.extend(client_args)
         
         # --- Authentication Logic ---
         # Priority 1: Use OAuth token if provided.
         if platform == 'youtube' and user_credentials and user_credentials.token:
-            logger.info("Using OAuth token for YouTube request.")
+            logger.debug("Using OAuth token for YouTube request.")
             cmd.extend(['--add-header', f"Authorization: Bearer {user_credentials.token}"])
         # Priority 2: Use browser cookies if specified.
         elif browser_for_cookies and os.getenv('RENDER') != 'true':
-            logger.info(f"Attempting to use cookies from '{browser_for_cookies}' browser.")
+            logger.debug("Attempting to use cookies from '%s' browser.", browser_for_cookies)
             cmd.extend(['--cookies-from-browser', browser_for_cookies])
         # Priority 3: Unauthenticated request with rotated user-agent.
         else:
-            logger.info("Making unauthenticated request with rotated user-agent.")
-            user_agents = [
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            ]
-            cmd.extend(['--user-agent', random.choice(user_agents)])
+            logger.debug("Making unauthenticated request with rotated user-agent.")
+            cmd.extend(next(_USER_AGENT_ARGS))
         
         return cmd
     
-    def get_video_info(self, url, user_credentials=None):
+    def _info_cache_key(self, url):
+        """Cache key for a URL; all URL variants of one video share it"""
+        platform = self.detect_platform(url)
+        video_id = self._extract_video_id(url) if platform == 'youtube' else None
+        return f"{platform}:{video_id or _canonical_url(url)}"
+
+    def _info_cache_path(self, key):
+        """Path of the cache file for a cache key"""
+        return os.path.join(INFO_CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def _remember_info(self, key, cached_at, info):
+        """Put an entry in the in-memory tier, evicting the least recently used beyond its size"""
+        with self._info_memo_lock:
+            self._info_memo[key] = (cached_at, info)
+            self._info_memo.move_to_end(key)
+            while len(self._info_memo) > INFO_MEMORY_CACHE_SIZE:
+                self._info_memo.popitem(last=False)
+
+    def _read_info_cache(self, url):
+        """Return the cached analysis for a URL, or None if missing or expired. Memory is checked before disk."""
+        key = self._info_cache_key(url)
+        now = time.time()
+        with self._info_memo_lock:
+            entry = self._info_memo.get(key)
+            if entry is not None:
+                if now - entry[0] <= INFO_CACHE_TTL:
+                    self._info_memo.move_to_end(key)
+                    return entry[1]
+                del self._info_memo[key]
+
+        try:
+            with open(self._info_cache_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        cached_at = entry.get('cached_at', 0)
+        if now - cached_at > INFO_CACHE_TTL:
+            return None
+        # Promote disk hits (e.g. written by the other worker) into this process's memory tier
+        self._remember_info(key, cached_at, entry.get('info'))
+        return entry.get('info')
+
+    def _write_info_cache(self, url, info):
+        """Store an analysis result, writing to a temp file first so readers never see a partial entry"""
+        key = self._info_cache_key(url)
+        cached_at = time.time()
+        self._remember_info(key, cached_at, info)
+        path = self._info_cache_path(key)
+        tmp_path = None
+        try:
+            # A uniquely named temp file per write: the gunicorn workers share the cache dir,
+            # so a name built from the thread ident could collide across processes
+            with tempfile.NamedTemporaryFile(mode='w', dir=INFO_CACHE_DIR, suffix='.tmp', delete=False, encoding='utf-8') as f:
+                tmp_path = f.name
+                json.dump({'cached_at': cached_at, 'info': info}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write info cache for {url}: {e}")
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def clear_info_cache(self):
+        """Drop every cached analysis from memory and disk. Returns the number of disk entries removed."""
+        with self._info_memo_lock:
+            self._info_memo.clear()
+        removed = 0
+        with os.scandir(INFO_CACHE_DIR) as entries:
+            for entry in entries:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+        logger.info(f"Cleared info cache ({removed} entries on disk)")
+        return removed
+
+    def prune_info_cache(self):
+        """Delete expired cache entries, then the oldest ones beyond INFO_CACHE_MAX_ENTRIES. Returns the number removed."""
+        now = time.time()
+        kept = []
+        removed = 0
+        with os.scandir(INFO_CACHE_DIR) as entries:
+            for entry in entries:
+                try:
+                    mtime = entry.stat().st_mtime
+                    if now - mtime > INFO_CACHE_TTL:
+                        os.remove(entry.path)
+                        removed += 1
+                    else:
+                        kept.append((mtime, entry.path))
+                except OSError:
+                    continue
+        if len(kept) > INFO_CACHE_MAX_ENTRIES:
+            kept.sort()
+            for _, path in kept[:len(kept) - INFO_CACHE_MAX_ENTRIES]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def get_video_info(self, url, user_credentials=None, refresh=False):
+        """Get video information, served from the info cache and coalescing concurrent anonymous lookups of the same URL"""
+        # Authenticated lookups may see private data, so only anonymous ones are cached or shared
+        if user_credentials is not None:
+            return self._fetch_video_info(url, user_credentials)
+
+        if not refresh:
+            cached = self._read_info_cache(url)
+            if cached is not None:
+                logger.info(f"Using cached analysis for {url}")
+                return cached
+
+        key = self._info_cache_key(url)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_owner:
+            logger.info(f"Waiting on in-flight analysis of {url}")
+            return future.result()
+
+        try:
+            result = self._fetch_video_info(url)
+            if result.get('success'):
+                self._write_info_cache(url, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    def _fetch_video_info(self, url, user_credentials=None):
         """Get video information using Invidious API for YouTube, yt-dlp for others"""
         try:
             # Detect platform
@@ -307,39 +721,155 @@ class InvidiousDownloader:
             logger.error(f"Error getting video info: {str(e)}", exc_info=True)
             return {'success': False, 'error': f'Failed to get video info: {str(e)}'}
 
+    def _available_instances(self):
+        """
+        Invidious instances not in cooldown, fastest first by smoothed response time. A little
+        jitter keeps near-equal instances sharing the load. If all are cooling down, the soonest
+        to recover come first.
+        """
+        now = time.monotonic()
+        with self._instance_lock:
+            ready = [i for i in self.invidious_instances if self._instance_cooldown.get(i, 0) <= now]
+            if ready:
+                return sorted(ready, key=lambda i: self._instance_latency.get(i, _INSTANCE_DEFAULT_LATENCY) + random.random() * 0.05)
+            return sorted(self.invidious_instances, key=lambda i: self._instance_cooldown.get(i, 0))
+
+    def _probe_instance(self, instance):
+        try:
+            response = self.session.head(f"{instance}/api/v1/stats", timeout=_INSTANCE_PROBE_TIMEOUT)
+            alive = response.status_code < 500 and response.status_code != 429
+        except requests.RequestException:
+            alive = False
+        if not alive:
+            logger.debug("Invidious instance %s failed its liveness probe", instance)
+        with self._instance_lock:
+            self._instance_health[instance] = (alive, time.monotonic())
+
+    def _live_instances(self):
+        """
+        Available instances minus those that failed a recent liveness probe. Stale entries are
+        re-probed in parallel first. If every instance looks dead, all are returned anyway.
+        """
+        instances = self._available_instances()
+        now = time.monotonic()
+        with self._instance_lock:
+            stale = [i for i in instances if now - self._instance_health.get(i, (True, -_INSTANCE_PROBE_TTL))[1] >= _INSTANCE_PROBE_TTL]
+            # Stamp them now so concurrent lookups don't probe the same instance again
+            for i in stale:
+                self._instance_health[i] = (self._instance_health.get(i, (True, 0))[0], now)
+        if stale:
+            wait([self._race_pool.submit(self._probe_instance, i) for i in stale], timeout=_INSTANCE_PROBE_TIMEOUT + 1)
+        with self._instance_lock:
+            live = [i for i in instances if self._instance_health.get(i, (True, 0))[0]]
+        return live or instances
+
+    def _mark_instance_failed(self, instance, retry_after=None):
+        """Put an instance in cooldown, honoring Retry-After when the server sent one"""
+        with self._instance_lock:
+            failures = self._instance_failures.get(instance, 0)
+            self._instance_failures[instance] = failures + 1
+            delay = retry_after if retry_after is not None else _backoff(failures)
+            self._instance_cooldown[instance] = time.monotonic() + delay
+        logger.warning(f"Invidious instance {instance} cooling down for {delay:.1f}s after {failures + 1} failure(s)")
+
+    def _mark_instance_ok(self, instance):
+        with self._instance_lock:
+            self._instance_failures.pop(instance, None)
+            self._instance_cooldown.pop(instance, None)
+
+    def _record_instance_response(self, instance, response):
+        """Cool an instance down on overload responses (429/5xx); any other response means it is up"""
+        if response.status_code == 429 or response.status_code >= 500:
+            self._mark_instance_failed(instance, _retry_after(response))
+        else:
+            self._mark_instance_ok(instance)
+            elapsed = response.elapsed.total_seconds()
+            with self._instance_lock:
+                previous = self._instance_latency.get(instance, _INSTANCE_DEFAULT_LATENCY)
+                self._instance_latency[instance] = 0.8 * previous + 0.2 * elapsed
+
+    def _adjust_race_width(self, success):
+        with self._instance_lock:
+            if success:
+                self._race_width = min(_INVIDIOUS_RACE_MAX, self._race_width + 0.5)
+            else:
+                self._race_width = max(1.0, self._race_width * 0.5)
+
+    def _fetch_invidious_video(self, instance, video_id):
+        """Fetch a video's JSON from one instance, recording its health. Returns (instance, data) or None."""
+        try:
+            logger.debug("Trying Invidious instance: %s", instance)
+            response = self.session.get(f"{instance}/api/v1/videos/{video_id}", timeout=7)
+            self._record_instance_response(instance, response)
+            if response.status_code == 200:
+                data = response.json()
+                self._adjust_race_width(success=True)
+                return instance, data
+            logger.warning(f"{instance} returned {response.status_code}")
+            if response.status_code == 429 or response.status_code >= 500:
+                self._adjust_race_width(success=False)
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            logger.warning(f"Invidious instance {instance} failed: {e}")
+            self._mark_instance_failed(instance)
+            self._adjust_race_width(success=False)
+        return None
+
+    def _race_first(self, fetch, instances, video_id, width=None):
+        """
+        Call fetch(instance, video_id) for up to `width` instances at once (default: the adaptive
+        race width), refilling as attempts fail. Returns the first non-None result, or None.
+        """
+        instances = list(instances)
+        pending = set()
+        while instances or pending:
+            while instances and len(pending) < (width or int(self._race_width)):
+                pending.add(self._race_pool.submit(fetch, instances.pop(0), video_id))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result:
+                    # Requests still in flight finish in the background and only update instance health
+                    return result
+        return None
+
     def get_youtube_info_from_invidious(self, video_id, user_credentials=None):
-        """Tries to get video info and stream URLs from Invidious."""
+        """
+        Tries to get video info and stream URLs from Invidious. Up to the current race width of
+        instances are queried at once and the first good response wins, so a dead instance
+        costs one parallel timeout instead of blocking the ones after it.
+        """
         logger.info(f"Analyzing YouTube video ID via Invidious: {video_id}")
-        for instance in self.invidious_instances:
-            try:
-                info_url = f"{instance}/api/v1/videos/{video_id}"
-                logger.info(f"Trying Invidious instance: {instance}")
-                response = requests.get(info_url, timeout=7)
-                if response.status_code == 200:
-                    data = response.json()
-                    logger.info(f"Successfully got data from {instance}")
-                    return self._parse_invidious_response(data, video_id, user_credentials=user_credentials)
-                logger.warning(f"{instance} returned {response.status_code}")
-            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-                logger.warning(f"Invidious instance {instance} failed: {e}")
+        result = self._race_first(self._fetch_invidious_video, self._live_instances(), video_id)
+        if result:
+            instance, data = result
+            logger.info(f"Successfully got data from {instance}")
+            return self._parse_invidious_response(data, video_id, user_credentials=user_credentials)
         return None # Return None if all instances fail
 
+    def _fetch_piped_streams(self, instance, video_id):
+        """Fetch a video's stream info from one Piped instance. Returns (instance, data) or None."""
+        try:
+            # Piped API endpoint for stream info, which includes metadata
+            logger.debug("Trying Piped instance: %s", instance)
+            response = self.session.get(f"{instance}/streams/{video_id}", timeout=7)
+            if response.status_code == 200:
+                return instance, response.json()
+            logger.warning(f"Piped instance {instance} returned {response.status_code}")
+        except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+            logger.warning(f"Piped instance {instance} failed: {e}")
+        return None
+
     def get_youtube_info_from_piped(self, video_id, user_credentials=None):
-        """Tries to get video info from Piped API."""
+        """Tries to get video info from Piped API, querying every instance at once."""
+        if not self.piped_instances:
+            return None
         logger.info(f"Analyzing YouTube video ID via Piped: {video_id}")
-        for instance in self.piped_instances:
-            try:
-                # Piped API endpoint for stream info, which includes metadata
-                info_url = f"{instance}/streams/{video_id}"
-                logger.info(f"Trying Piped instance: {instance}")
-                response = requests.get(info_url, timeout=7)
-                if response.status_code == 200:
-                    data = response.json()
-                    logger.info(f"Successfully got data from Piped instance {instance}")
-                    return self._parse_piped_response(data, video_id, user_credentials=user_credentials)
-                logger.warning(f"Piped instance {instance} returned {response.status_code}")
-            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-                logger.warning(f"Piped instance {instance} failed: {e}")
+        result = self._race_first(self._fetch_piped_streams, self.piped_instances, video_id,
+                                  width=len(self.piped_instances))
+        if result:
+            instance, data = result
+            logger.info(f"Successfully got data from Piped instance {instance}")
+            return self._parse_piped_response(data, video_id, user_credentials=user_credentials)
         return None
 
     def _get_youtube_info_from_rapidapi(self, video_id, user_credentials=None):
@@ -364,7 +894,7 @@ class InvidiousDownloader:
         }
 
         try:
-            response = requests.get(api_url, headers=headers, params=params, timeout=25)
+            response = self.session.get(api_url, headers=headers, params=params, timeout=25)
 
             if response.status_code == 200:
                 data = response.json()
@@ -392,7 +922,7 @@ class InvidiousDownloader:
 
             # Handle `cloud-api-hub` style response
             if details:
-                logger.info("Parsing RapidAPI response (videoDetails structure).")
+                logger.debug("Parsing RapidAPI response (videoDetails structure).")
                 title = details.get('title')
                 if details.get('lengthSeconds'):
                     duration = self._format_duration(int(details.get('lengthSeconds', 0) or 0))
@@ -404,7 +934,7 @@ class InvidiousDownloader:
 
             # Handle yt-dlp style flat response
             elif 'title' in response_data:
-                logger.info("Parsing RapidAPI response (yt-dlp flat structure).")
+                logger.debug("Parsing RapidAPI response (yt-dlp flat structure).")
                 title = response_data.get('title')
                 duration_sec = response_data.get('duration')
                 if duration_sec:
@@ -417,7 +947,8 @@ class InvidiousDownloader:
             if not title:
                 error_msg = response_data.get('error') or response_data.get('message') or 'API response did not contain videoDetails or title.'
                 logger.warning(f"RapidAPI YouTube downloader failed: {error_msg}")
-                logger.warning(f"Raw RapidAPI response that failed parsing: {json.dumps(response_data, indent=2)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Raw RapidAPI response that failed parsing: %s", json.dumps(response_data, indent=2))
                 return None
 
             title = title or f'Video {video_id[:8]}...'
@@ -429,6 +960,10 @@ class InvidiousDownloader:
             formats = []
             source = 'yt-dlp' # Default if no links found
 
+            # The API often lists several streams per resolution (different codecs/bitrates);
+            # only the first per (type, resolution, container) is offered, and its size string
+            # is only built once it is kept.
+            seen = set()
             for fmt in response_data.get('formats', []):
                 if not fmt.get('url'):
                     continue
@@ -438,27 +973,20 @@ class InvidiousDownloader:
                     mime_type_str = fmt.get('mimeType', 'video/mp4')
                     parts = mime_type_str.split(';')[0].split('/')
                     container = parts[1] if len(parts) > 1 else 'mp4'
+                    filesize = int(fmt.get('contentLength', 0) or 0)
                     
                     if fmt.get('hasVideo'): # Treat combined as video
-                        formats.append({
-                            'format_id': f"rapidapi_video_{fmt.get('qualityLabel')}",
-                            'resolution': fmt.get('qualityLabel'),
-                            'filesize': self.format_file_size(int(fmt.get('contentLength', 0) or 0)),
-                            'type': 'video',
-                            'container': container,
-                            'url': fmt.get('url')
-                        })
+                        fmt_type = 'video'
+                        format_id = f"rapidapi_video_{fmt.get('qualityLabel')}"
+                        resolution = fmt.get('qualityLabel')
                     elif fmt.get('hasAudio'):
                         bitrate = fmt.get('audioBitrate')
                         quality_label = f"{bitrate // 1000}kbps" if bitrate else "Audio"
-                        formats.append({
-                            'format_id': f"rapidapi_audio_{fmt.get('itag')}",
-                            'resolution': f"Audio ({quality_label})",
-                            'filesize': self.format_file_size(int(fmt.get('contentLength', 0) or 0)),
-                            'type': 'audio',
-                            'container': container,
-                            'url': fmt.get('url')
-                        })
+                        fmt_type = 'audio'
+                        format_id = f"rapidapi_audio_{fmt.get('itag')}"
+                        resolution = f"Audio ({quality_label})"
+                    else:
+                        continue
                 
                 # --- Style 2: yt-dlp style format (uses vcodec/acodec, like the user provided) ---
                 elif 'vcodec' in fmt or 'acodec' in fmt:
@@ -466,16 +994,33 @@ class InvidiousDownloader:
                     has_audio = fmt.get('acodec') != 'none' and fmt.get('acodec') is not None
                     container = fmt.get('ext', 'mp4')
                     filesize = fmt.get('filesize') or fmt.get('filesize_approx') or 0
-                    format_id = fmt.get('format_id') or ('video' if has_video else 'audio')
-                    api_format_id = f"rapidapi_{format_id}"
+                    format_id = f"rapidapi_{fmt.get('format_id') or ('video' if has_video else 'audio')}"
 
                     if has_video:
-                        quality_label = f"{fmt.get('height')}p" if fmt.get('height') else 'Video'
-                        formats.append({'format_id': api_format_id, 'resolution': quality_label, 'filesize': self.format_file_size(filesize), 'type': 'video', 'container': container, 'url': fmt.get('url')})
-                    elif has_audio and not has_video:
+                        fmt_type = 'video'
+                        resolution = f"{fmt.get('height')}p" if fmt.get('height') else 'Video'
+                    elif has_audio:
                         abr = fmt.get('abr')
                         quality_label = f"{int(abr)}kbps" if abr else "Audio"
-                        formats.append({'format_id': api_format_id, 'resolution': f"Audio ({quality_label})", 'filesize': self.format_file_size(filesize), 'type': 'audio', 'container': container, 'url': fmt.get('url')})
+                        fmt_type = 'audio'
+                        resolution = f"Audio ({quality_label})"
+                    else:
+                        continue
+                else:
+                    continue
+
+                key = (fmt_type, resolution, container)
+                if key in seen:
+                    continue
+                seen.add(key)
+                formats.append({
+                    'format_id': format_id,
+                    'resolution': resolution,
+                    'filesize': self.format_file_size(filesize),
+                    'type': fmt_type,
+                    'container': container,
+                    'url': fmt.get('url')
+                })
 
             if formats:
                 logger.info(f"Successfully extracted {len(formats)} stream URLs from RapidAPI.")
@@ -488,7 +1033,8 @@ class InvidiousDownloader:
             return { 'success': True, 'title': title, 'duration': duration, 'thumbnail': thumbnail, 'uploader': uploader, 'view_count': view_count, 'formats': formats, 'platform': 'youtube', 'video_id': video_id, 'source': source }
         except Exception as e:
             logger.error(f"Error parsing RapidAPI YouTube response: {e}", exc_info=True)
-            logger.warning(f"Raw RapidAPI response data that failed parsing: {json.dumps(response_data, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Raw RapidAPI response data that failed parsing: %s", json.dumps(response_data, indent=2))
             return None
 
     def _parse_piped_response(self, data, video_id, user_credentials=None):
@@ -525,8 +1071,8 @@ class InvidiousDownloader:
             import subprocess
             base_cmd = self._get_yt_dlp_base_cmd(user_credentials, platform='youtube')
             cmd = base_cmd + ['--get-title', url]
-            logger.info(f"Getting title with yt-dlp: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
+            logger.debug("Getting title with yt-dlp: %s", cmd)
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=_time_left(15))
             if result.returncode == 0 and result.stdout.strip():
                 title = result.stdout.strip()
                 logger.info(f"Got title via yt-dlp: {title}")
@@ -548,16 +1094,16 @@ class InvidiousDownloader:
             logger.error("Could not get title for search-based fallback. Aborting search.")
             return None
 
-        from urllib.parse import quote
         encoded_title = quote(title)
 
         # 2. Loop through Invidious instances and search
-        for instance in self.invidious_instances:
+        for instance in self._live_instances():
             try:
                 search_url = f"{instance}/api/v1/search?q={encoded_title}"
-                logger.info(f"Searching on Invidious instance: {search_url}")
+                logger.debug("Searching on Invidious instance: %s", search_url)
                 
-                search_response = requests.get(search_url, timeout=10)
+                search_response = self.session.get(search_url, timeout=10)
+                self._record_instance_response(instance, search_response)
                 if search_response.status_code != 200:
                     logger.warning(f"Invidious search on {instance} failed with status {search_response.status_code}")
                     continue
@@ -571,7 +1117,7 @@ class InvidiousDownloader:
                     logger.info(f"Found matching video ID {video_id} in search results from {instance}")
                     # 4. Now that we have a working instance, make a direct API call to get full details
                     info_url = f"{instance}/api/v1/videos/{video_id}"
-                    info_response = requests.get(info_url, timeout=7)
+                    info_response = self.session.get(info_url, timeout=7)
                     if info_response.status_code == 200:
                         data = info_response.json()
                         logger.info(f"Successfully got full data from {instance} after search.")
@@ -581,16 +1127,16 @@ class InvidiousDownloader:
                         return parsed_data
             except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
                 logger.warning(f"Invidious search on instance {instance} failed: {e}")
+                self._mark_instance_failed(instance)
         
         logger.error(f"Invidious search-based fallback failed for video ID: {video_id} across all instances.")
         return None
 
     def _get_generic_platform_info(self, url, platform, user_credentials=None):
         """Get video info from yt-dlp for non-YouTube platforms, or RapidAPI for Spotify"""
+        import subprocess
+
         try:
-            import subprocess
-            import json
-            
             # Handle Spotify with RapidAPI instead of yt-dlp
             if platform == 'spotify':
                 return self._get_spotify_info(url)
@@ -604,10 +1150,10 @@ class InvidiousDownloader:
                 extra_args=['--dump-json']
             )
             
-            logger.info(f"yt-dlp return code: {result.returncode}")
-            logger.info(f"yt-dlp stdout length: {len(result.stdout)}")
+            logger.debug("yt-dlp return code: %s", result.returncode)
+            logger.debug("yt-dlp stdout length: %d", len(result.stdout))
             if result.stderr:
-                logger.info(f"yt-dlp stderr: {result.stderr[:500]}")
+                logger.debug("yt-dlp stderr: %s", result.stderr[:500])
             
             if result.returncode != 0:
                 error_msg = result.stderr or "Failed to get video info"
@@ -649,10 +1195,10 @@ class InvidiousDownloader:
                 thumbnail = data.get('thumb', '')
             
             logger.info(f"Got {platform} info: {title} by {uploader}")
-            logger.info(f"Thumbnail URL: {thumbnail[:100] if thumbnail else 'None'}")
+            logger.debug("Thumbnail URL: %.100s", thumbnail or 'None')
             
-            # Get available formats
-            formats = self._get_available_formats(url, user_credentials=user_credentials)
+            # Get available formats from the same extraction
+            formats = self._get_available_formats(url, user_credentials=user_credentials, info=data)
             
             return {
                 'success': True,
@@ -673,11 +1219,73 @@ class InvidiousDownloader:
             logger.error(f"Error getting {platform} info: {e}", exc_info=True)
             return {'success': False, 'error': f'Unable to access this content. Please check the URL and try again.'}
     
+    def get_playlist_info(self, url, user_credentials=None, enrich=False):
+        """
+        List a playlist's videos with a single flat yt-dlp extraction. With `enrich`, the first
+        PLAYLIST_ENRICH_MAX entries are then analyzed with get_video_info, PLAYLIST_INFO_WORKERS
+        at a time, so one request stays well inside the worker timeout.
+        """
+        import subprocess
+
+        platform = self.detect_platform(url)
+        try:
+            result = self._run_yt_dlp_with_cookie_fallback(
+                url,
+                user_credentials,
+                platform,
+                extra_args=['--flat-playlist', '--dump-single-json', '--playlist-end', str(PLAYLIST_MAX_ENTRIES)]
+            )
+            if result.returncode != 0 or not result.stdout.strip():
+                logger.error(f"yt-dlp playlist extraction failed for {url}: {result.stderr[:500]}")
+                return {'success': False, 'error': f'Unable to access this {platform} playlist. It may be private or unavailable.'}
+
+            data = json.loads(result.stdout)
+        except subprocess.TimeoutExpired:
+            logger.error(f"yt-dlp playlist extraction timed out for {url}")
+            return {'success': False, 'error': 'Request timed out while reading the playlist. Please try again.'}
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON parse error for playlist {url}: {e}")
+            return {'success': False, 'error': 'Unable to parse the playlist. Please try a different link.'}
+
+        entries = []
+        for entry in data.get('entries') or []:
+            video_url = entry.get('url') or entry.get('webpage_url')
+            if not video_url:
+                continue
+            if platform == 'youtube' and not video_url.startswith(('http://', 'https://')):
+                video_url = f"https://www.youtube.com/watch?v={entry.get('id') or video_url}"
+            thumbnails = entry.get('thumbnails') or []
+            entries.append({
+                'id': entry.get('id'),
+                'title': entry.get('title') or 'Unknown Title',
+                'url': video_url,
+                'duration': self._format_duration(entry.get('duration')),
+                'thumbnail': thumbnails[-1].get('url', '') if thumbnails else ''
+            })
+
+        logger.info(f"Playlist '{data.get('title')}' listed with {len(entries)} entries")
+
+        page = entries[:PLAYLIST_ENRICH_MAX] if enrich else []
+        if page:
+            with ThreadPoolExecutor(max_workers=min(PLAYLIST_INFO_WORKERS, len(page))) as pool:
+                infos = pool.map(lambda e: self.get_video_info(e['url'], user_credentials=user_credentials), page)
+                for entry, info in zip(page, infos):
+                    entry['info'] = info
+
+        return {
+            'success': True,
+            'title': data.get('title', 'Unknown Playlist'),
+            'uploader': data.get('uploader') or data.get('channel') or 'Unknown',
+            'platform': platform,
+            'url': url,
+            'entry_count': len(entries),
+            'enriched_count': len(page),
+            'entries': entries
+        }
+
     def _get_spotify_info(self, url):
         """Get Spotify track info using RapidAPI Spotify Downloader API"""
         try:
-            import requests
-            
             # Get RapidAPI credentials from environment
             rapidapi_key = os.getenv('RAPIDAPI_SPOTIFY_KEY') or os.getenv('RAPIDAPI_KEY')
             rapidapi_host = os.getenv('RAPIDAPI_SPOTIFY_HOST', 'spotify-downloader9.p.rapidapi.com')
@@ -696,14 +1304,14 @@ class InvidiousDownloader:
             api_url = f"https://{rapidapi_host}/downloadSong"
             params = {"songId": url}
             
-            logger.info(f"Calling Spotify API: {api_url}")
-            response = requests.get(api_url, headers=headers, params=params, timeout=20)
+            logger.debug("Calling Spotify API: %s", api_url)
+            response = self.session.get(api_url, headers=headers, params=params, timeout=20)
             
-            logger.info(f"API Response status: {response.status_code}")
+            logger.debug("API Response status: %s", response.status_code)
             
             if response.status_code == 200:
                 response_data = response.json()
-                logger.info(f"Spotify API Response: {response_data}")
+                logger.debug("Spotify API Response: %s", response_data)
                 
                 if response_data.get('success'):
                     # The actual track data is nested in the 'data' field
@@ -772,30 +1380,41 @@ class InvidiousDownloader:
             formats = []
             source = 'yt-dlp' # Default source
 
-            # Video streams with audio (from formatStreams)
+            # Video streams with audio (from formatStreams), one per resolution and container
+            seen = set()
             for stream in data.get('formatStreams', []):
                 if 'video' in stream.get('type', '') and stream.get('url'):
+                    key = (stream.get('qualityLabel'), stream.get('container'))
+                    if key in seen:
+                        continue
+                    seen.add(key)
                     formats.append({
                         'format_id': f"invidious_{stream.get('qualityLabel')}",
                         'resolution': stream.get('qualityLabel'),
-                        'filesize': self.format_file_size(stream.get('size')),
+                        'filesize': self.format_file_size(stream.get('clen')),
                         'type': 'video',
                         'container': stream.get('container'),
                         'url': stream.get('url') # Direct download URL
                     })
 
-            # Audio-only streams (from adaptiveFormats)
+            # Audio-only streams (from adaptiveFormats). Their type is a MIME string such as
+            # 'audio/webm; codecs="opus"'; only the highest-bitrate stream per container is offered.
+            audio_by_container = {}
             for stream in data.get('adaptiveFormats', []):
-                if stream.get('type', '') == 'audio' and stream.get('url'):
-                    formats.append({
-                        'format_id': f"invidious_audio_{stream.get('audioQuality')}",
-                        'format': f"Audio ({stream.get('encoding')})",
-                        'resolution': f"Audio ({stream.get('audioQuality')})",
-                        'filesize': self.format_file_size(stream.get('size')),
-                        'type': 'audio',
-                        'container': stream.get('container'),
-                        'url': stream.get('url') # Direct download URL
-                    })
+                if stream.get('type', '').startswith('audio') and stream.get('url'):
+                    audio_by_container.setdefault(stream.get('container'), []).append(stream)
+
+            for container, streams in audio_by_container.items():
+                stream = max(streams, key=lambda s: int(s.get('bitrate') or 0))
+                formats.append({
+                    'format_id': f"invidious_audio_{stream.get('itag')}",
+                    'format': f"Audio ({stream.get('encoding')})",
+                    'resolution': f"Audio ({stream.get('audioQuality')})",
+                    'filesize': self.format_file_size(stream.get('clen')),
+                    'type': 'audio',
+                    'container': container,
+                    'url': stream.get('url') # Direct download URL
+                })
             
             if formats:
                 logger.info(f"Successfully extracted {len(formats)} native stream URLs from Invidious.")
@@ -833,18 +1452,17 @@ class InvidiousDownloader:
             base_cmd = self._get_yt_dlp_base_cmd(user_credentials, platform)
             cmd = base_cmd + extra_args + [url]
             logger.info("Attempting yt-dlp execution with OAuth token.")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=_time_left(30))
             if result.returncode == 0 and result.stdout:
                 return result
 
         # Priority 2: Try with browser cookies on local dev
         if os.getenv('RENDER') != 'true':
-            browsers_to_try = ['chrome', 'firefox', 'edge', 'brave', 'vivaldi', 'chromium']
-            for browser in browsers_to_try:
+            for browser in _COOKIE_BROWSERS:
                 base_cmd = self._get_yt_dlp_base_cmd(user_credentials, platform, browser_for_cookies=browser)
                 cmd = base_cmd + extra_args + [url]
                 logger.info(f"Attempting yt-dlp execution with cookies from '{browser}'.")
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=_time_left(30))
                 if result.returncode == 0 and result.stdout:
                     logger.info(f"Successfully executed with cookies from '{browser}'.")
                     return result
@@ -855,13 +1473,15 @@ class InvidiousDownloader:
         base_cmd = self._get_yt_dlp_base_cmd(user_credentials, platform, browser_for_cookies=None)
         cmd = base_cmd + extra_args + [url]
         logger.info("Attempting yt-dlp execution without browser cookies as a final fallback.")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=_time_left(30))
         return result
 
     def _get_fallback_info(self, video_id, user_credentials=None):
         """
         Final fallback using yt-dlp. This should return a failure if it cannot get real info.
         """
+        import subprocess
+
         try:
             result = self._run_yt_dlp_with_cookie_fallback(
                 f'https://www.youtube.com/watch?v={video_id}',
@@ -882,8 +1502,8 @@ class InvidiousDownloader:
                     uploader = data.get('uploader', data.get('channel', data.get('creator', 'Unknown')))
                     logger.info(f"Got info from yt-dlp fallback: {title} by {uploader} ({duration})")
 
-                    # Get formats
-                    formats = self._get_available_formats(f'https://www.youtube.com/watch?v={video_id}', user_credentials=user_credentials)
+                    # Get formats from the same extraction
+                    formats = self._get_available_formats(f'https://www.youtube.com/watch?v={video_id}', user_credentials=user_credentials, info=data)
 
                     return {
                         'success': True,
@@ -1015,31 +1635,35 @@ class InvidiousDownloader:
             }
         ]
     
-    def _get_available_formats(self, url, user_credentials=None):
-        """Get actual available formats from yt-dlp"""
+    def _get_available_formats(self, url, user_credentials=None, info=None):
+        """
+        Get actual available formats from yt-dlp. Callers that already have the --dump-json
+        output for `url` pass it as `info`, which saves running a second extraction.
+        """
         try:
-            import subprocess
-            import json
-            
-            result = self._run_yt_dlp_with_cookie_fallback(
-                url,
-                user_credentials,
-                self.detect_platform(url),
-                extra_args=['--dump-json']
-            )
-            
-            if result.returncode != 0:
-                logger.warning("Failed to get formats from yt-dlp, using defaults")
-                return self._get_default_formats()
-            
-            data = json.loads(result.stdout)
-            formats_data = data.get('formats', [])
+            if info is None:
+                result = self._run_yt_dlp_with_cookie_fallback(
+                    url,
+                    user_credentials,
+                    self.detect_platform(url),
+                    extra_args=['--dump-json']
+                )
+                
+                if result.returncode != 0:
+                    logger.warning("Failed to get formats from yt-dlp, using defaults")
+                    return self._get_default_formats()
+                
+                info = json.loads(result.stdout)
+            formats_data = info.get('formats', [])
             
-            # Extract video resolutions with container info and filesizes
+            # Extract video resolutions with container info and filesizes in a single pass.
+            # The best filesize per container is tracked alongside, so the "Best" options
+            # below don't need a second scan over every height.
             available_heights = {}  # {height: {container: filesize}}
+            best_by_container = {}  # {container: largest filesize across all heights}
             audio_formats = {}  # {format_id: filesize}
             audio_available = False
-            
+
             for fmt in formats_data:
                 has_video = fmt.get('vcodec') != 'none'
                 has_audio = fmt.get('acodec') != 'none'
@@ -1048,31 +1672,32 @@ class InvidiousDownloader:
                 if has_audio:
                     audio_available = True
 
+                filesize = fmt.get('filesize') or fmt.get('filesize_approx') or 0
+
                 # Check for video formats with height
-                if has_video and fmt.get('height'):
+                if has_video:
                     height = fmt.get('height')
+                    if not height:
+                        continue
                     container = fmt.get('ext', 'mp4').lower()  # Get container from ext field
-                    filesize = fmt.get('filesize') or fmt.get('filesize_approx') or 0
-                    
-                    if height not in available_heights:
-                        available_heights[height] = {}
-                    
+                    height_data = available_heights.setdefault(height, {})
+
                     # Keep the largest filesize for each height+container combo
-                    if container not in available_heights[height] or filesize > available_heights[height][container]:
-                        available_heights[height][container] = filesize
-                
+                    if filesize > height_data.get(container, -1):
+                        height_data[container] = filesize
+                    if filesize > best_by_container.get(container, -1):
+                        best_by_container[container] = filesize
+
                 # Check for audio-only formats to get more accurate size estimates
-                if has_audio and not has_video:
-                    format_id = fmt.get('format_id', 'audio')
-                    filesize = fmt.get('filesize') or fmt.get('filesize_approx') or 0
-                    audio_formats[format_id] = filesize
-            
-            logger.info(f"Available heights with containers: {available_heights}")
-            logger.info(f"Audio available: {audio_available}")
-            
+                elif has_audio:
+                    audio_formats[fmt.get('format_id', 'audio')] = filesize
+
+            logger.debug("Available heights with containers: %s", available_heights)
+            logger.debug("Audio available: %s", audio_available)
+
             # Build format list based on available heights
             formats = []
-            
+
             # Add video formats that are available (from all containers)
             quality_options = [
                 ('2160', '2160p (4K)', 2160),
@@ -1082,13 +1707,8 @@ class InvidiousDownloader:
                 ('480', '480p', 480),
                 ('360', '360p', 360),
             ]
-            
-            # Collect all available containers
-            all_containers = set()
-            for height_data in available_heights.values():
-                all_containers.update(height_data.keys())
-            
-            logger.info(f"Available containers: {all_containers}")
+
+            logger.debug("Available containers: %s", set(best_by_container))
             
             # For each quality, add all available container versions
             for quality_id, resolution, height in quality_options:
@@ -1107,12 +1727,7 @@ class InvidiousDownloader:
             
             # Add best quality options for each container if videos available
             if available_heights:
-                for container in all_containers:
-                    best_filesize = 0
-                    for height_data in available_heights.values():
-                        if container in height_data:
-                            best_filesize = max(best_filesize, height_data[container])
-                    
+                for container, best_filesize in best_by_container.items():
                     formats.append({
                         'format_id': container,  # Use container as format_id for best options
                         'resolution': f'{container.upper()} (Best)',
@@ -1179,27 +1794,7 @@ class InvidiousDownloader:
     
     def _extract_video_id(self, url):
         """Extract YouTube video ID from various URL formats"""
-        try:
-            from urllib.parse import urlparse, parse_qs
-            
-            parsed_url = urlparse(url)
-            
-            # Handle youtube.com/watch?v=XXX
-            if 'youtube.com' in parsed_url.netloc:
-                return parse_qs(parsed_url.query).get('v', [None])[0]
-            
-            # Handle youtu.be/XXX
-            elif 'youtu.be' in parsed_url.netloc:
-                return parsed_url.path.strip('/')
-            
-            # Handle youtube.com/shorts/XXX
-            elif 'shorts' in parsed_url.path:
-                return parsed_url.path.split('/')[-1]
-            
-            return None
-        except Exception as e:
-            logger.error(f"Error extracting video ID: {e}")
-            return None
+        return _extract_video_id(url)
     
     def download_media(self, url, quality='720', media_type='video', user_credentials=None, direct_format_url=None):
         """Download media using OAuth for YouTube, yt-dlp for others"""
@@ -1216,7 +1811,7 @@ class InvidiousDownloader:
             if quality and ('invidious' in quality or 'rapidapi' in quality):
                 logger.info(f"Handling API-provided format for quality: {quality}")
                 # Re-analyze to get a fresh URL, as they are often time-sensitive
-                api_info = self.get_video_info(url, user_credentials=user_credentials)
+                api_info = self.get_video_info(url, user_credentials=user_credentials, refresh=True)
                 if api_info and api_info.get('success'):
                     selected_format = next((f for f in api_info.get('formats', []) if f.get('format_id') == quality), None)
                     if selected_format and selected_format.get('url'):
@@ -1244,6 +1839,39 @@ class InvidiousDownloader:
             logger.error(f"Download error: {str(e)}", exc_info=True)
             return {'success': False, 'error': f'Download failed: {str(e)}'}
     
+    def download_batch(self, urls, quality='720', media_type='video', user_credentials=None):
+        """
+        Download several URLs, BATCH_DOWNLOAD_WORKERS at a time, for at most BATCH_TIMEOUT
+        seconds. Results are returned in the order of `urls`; a failure on one URL does not
+        affect the others. Downloads still running at the deadline are killed, their partial
+        files removed, and they are reported as timed out.
+        """
+        deadline = time.monotonic() + BATCH_TIMEOUT
+
+        def download_one(url):
+            _batch_deadline.at = deadline
+            try:
+                if time.monotonic() < deadline:
+                    result = self.download_media(url, quality=quality, media_type=media_type, user_credentials=user_credentials)
+                else:
+                    result = {'success': False}
+            except Exception as e:
+                logger.error(f"Batch download of {url} failed: {e}", exc_info=True)
+                result = {'success': False, 'error': f'Download failed: {str(e)}'}
+            finally:
+                _batch_deadline.at = None
+            if not result.get('success') and time.monotonic() >= deadline:
+                logger.warning(f"Batch download of {url} did not finish within {BATCH_TIMEOUT}s")
+                result = {'success': False, 'error': 'Download did not finish in time. Please download this URL on its own.'}
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_DOWNLOAD_WORKERS, len(urls)))) as pool:
+            results = list(pool.map(download_one, urls))
+
+        for url, result in zip(urls, results):
+            result['url'] = url
+        return results
+
     def _download_with_yt_dlp(self, url, quality, media_type, platform, user_credentials=None, direct_format_url=None):
         """Download using yt-dlp, routing unauthenticated YouTube through Invidious."""
         download_url = direct_format_url or url
@@ -1254,7 +1882,7 @@ class InvidiousDownloader:
         if platform == 'youtube' and not user_credentials and not direct_format_url:
             video_id = self._extract_video_id(url)
             if video_id:
-                for instance_url in self.invidious_instances:
+                for instance_url in self._live_instances():
                     invidious_url = f"{instance_url}/watch?v={video_id}"
                     logger.info(f"Unauthenticated YouTube download. Routing through Invidious instance: {instance_url}")
                     
@@ -1273,11 +1901,15 @@ class InvidiousDownloader:
 
     def _execute_yt_dlp_download(self, download_url, quality, media_type, platform, user_credentials):
         """Helper function to execute a single yt-dlp download command."""
-        import tempfile
         import subprocess
 
         filepath_info_file = None
+        work_dir = None
         try:
+            # yt-dlp's partial files go to a directory of this download's own, so a failed or
+            # killed download leaves nothing behind once it is removed
+            work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+
             # Create a temp file to store the final filename from yt-dlp
             with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8', suffix='.txt') as tmp_file:
                 filepath_info_file = tmp_file.name
@@ -1287,44 +1919,48 @@ class InvidiousDownloader:
             # Build command using the 'platform' which may be 'generic' for Invidious routes
             base_cmd = self._get_yt_dlp_base_cmd(user_credentials, platform)
             
+            if media_type == 'audio':
+                # Stream straight into ffmpeg first; the download-then-encode path below is kept
+                # for sources ffmpeg can't read from a pipe (e.g. MP4 with the index at the end)
+                streamed = self._stream_mp3(download_url, platform, user_credentials)
+                if streamed is not None:
+                    return streamed
+
             cmd = []
             if media_type == 'audio':
-                output_template = os.path.join(self.base_dir, f'%(title)s__audio.%(ext)s')
-                cmd = base_cmd + [
-                    '-f', 'bestaudio',
-                    '-x',
-                    '--audio-format', 'mp3',
-                    '--audio-quality', '192',
-                    '-o', output_template,
-                ]
-                logger.info(f"Downloading audio from {platform}")
+                output_template = '%(title)s__audio.%(ext)s'
+                # Download only; the MP3 encode happens afterwards once an encode slot is free
+                cmd = base_cmd + [*_AUDIO_DOWNLOAD_ARGS, '-o', output_template]
+                logger.debug("Downloading audio from %s", platform)
             else:
-                quality_map = {
-                    '2160': 'bv[height<=2160]+ba/b[height<=2160]/bv+ba/b',
-                    '1440': 'bv[height<=1440]+ba/b[height<=1440]/bv+ba/b',
-                    '1080': 'bv[height<=1080]+ba/b[height<=1080]/bv+ba/b',
-                    '720': 'bv[height<=720]+ba/b[height<=720]/bv+ba/b',
-                    '480': 'bv[height<=480]+ba/b[height<=480]/bv+ba/b',
-                    '360': 'bv[height<=360]+ba/b[height<=360]/bv+ba/b',
-                    'mp4': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-                    'webm': 'bestvideo[ext=webm]+bestaudio[ext=webm]/best[ext=webm]/best',
-                    'best': 'bestvideo+bestaudio/best',
-                }
-                format_spec = quality_map.get(quality, 'bestvideo+bestaudio/best')
+                format_spec = _QUALITY_FORMATS.get(quality, _QUALITY_FORMATS['best'])
                 
-                output_template = os.path.join(self.base_dir, f'%(title)s__{quality}.%(ext)s')
+                output_template = f'%(title)s__{quality}.%(ext)s'
                 cmd = base_cmd + [
                     '-f', format_spec,
                     '-o', output_template,
                 ]
-                logger.info(f"Downloading video {quality} from {platform}")
-            
+                logger.debug("Downloading video %s from %s", quality, platform)
+            
+            # Progress bars are never shown to anyone here; without them yt-dlp's captured output
+            # stays a few lines instead of growing with every progress update during long downloads.
+            cmd.extend(['--no-progress', '--buffer-size', YTDLP_BUFFER_SIZE])
+            cmd.extend(['--concurrent-fragments', YTDLP_CONCURRENT_FRAGMENTS,
+                        '--http-chunk-size', YTDLP_HTTP_CHUNK_SIZE])
+            if ARIA2C_PATH and YTDLP_RANGE_CONNECTIONS > 1:
+                cmd.extend(['--downloader', 'http:aria2c', '--downloader-args',
+                            f'aria2c:-x{YTDLP_RANGE_CONNECTIONS} -s{YTDLP_RANGE_CONNECTIONS} -k1M '
+                            '--summary-interval=0 --console-log-level=warn'])
+            # Output templates are relative to these: in-progress files stay out of base_dir
+            cmd.extend(['-P', f'home:{self.base_dir}', '-P', f'temp:{work_dir}'])
+
             # Add the --print-to-file argument to get the final path and the URL to download
             cmd.extend(['--print-to-file', 'after_move:filepath', filepath_info_file])
             cmd.append(download_url)
 
-            logger.info(f"Running command: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            logger.debug("Running command: %s", cmd)
+            started_at = time.time()
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=_time_left(600))
 
             # Check for explicit errors in stderr, even with exit code 0
             if "ERROR:" in result.stderr:
@@ -1333,9 +1969,13 @@ class InvidiousDownloader:
                 return {'success': False, 'error': f'Download failed: {error_msg}'}
             
             if result.returncode == 0:
-                return self._process_download_result(result, platform=platform,
-                                                    media_type=media_type, quality=quality,
-                                                    filepath_info_file=filepath_info_file)
+                download = self._process_download_result(result, platform=platform,
+                                                        media_type=media_type, quality=quality,
+                                                        filepath_info_file=filepath_info_file,
+                                                        started_at=started_at)
+                if media_type == 'audio' and download.get('success'):
+                    download = self._encode_mp3(download)
+                return download
             else:
                 error_msg = result.stderr[:500] if result.stderr else 'Unknown error'
                 logger.error(f"Download failed: {error_msg}")
@@ -1349,30 +1989,213 @@ class InvidiousDownloader:
             logger.error(f"Download error: {str(e)}", exc_info=True)
             return {'success': False, 'error': f'Download failed: {str(e)}'}
         finally:
-            # Ensure the temp file is always cleaned up
-            if filepath_info_file and os.path.exists(filepath_info_file):
-                os.remove(filepath_info_file)
+            # Ensure the temp file and any partial downloads are always cleaned up
+            if filepath_info_file:
+                try:
+                    os.remove(filepath_info_file)
+                except FileNotFoundError:
+                    pass
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
 
-    def _process_download_result(self, result, platform, media_type, quality, filepath_info_file):
+    def _stream_mp3(self, download_url, platform, user_credentials):
+        """
+        Download the best audio with yt-dlp writing to stdout and encode it to MP3 with ffmpeg
+        reading from that pipe, so the source audio never touches disk. The download runs on
+        the calling thread; the ffmpeg process takes one of the FFMPEG_MAX_JOBS encode slots.
+        Returns None when the disk path should be used instead: no encode slot is free right
+        now (so downloads never queue behind encodes), or ffmpeg couldn't read the stream.
+        """
+        import subprocess
+
+        if not self._encode_slots.acquire(blocking=False):
+            logger.debug("No free encode slot; downloading audio to disk before encoding")
+            return None
+
+        work_dir = None
+        try:
+            # Everything stays in a directory of this download's own until the MP3 is moved into
+            # place, so removing it cleans up after a failed or killed download
+            work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+            name_file = os.path.join(work_dir, 'name.txt')
+            tmp_dst = os.path.join(work_dir, 'audio.mp3')
+
+            # The same name the download-to-disk output template produces, sanitized by yt-dlp
+            cmd = self._get_yt_dlp_base_cmd(user_credentials, platform) + [
+                *_AUDIO_DOWNLOAD_ARGS, '-o', '-',
+                '--no-progress', '--buffer-size', YTDLP_BUFFER_SIZE,
+                '--concurrent-fragments', YTDLP_CONCURRENT_FRAGMENTS,
+                '--http-chunk-size', YTDLP_HTTP_CHUNK_SIZE,
+                '-P', f'temp:{work_dir}',
+                '--print-to-file', 'before_dl:%(title)S__audio', name_file,
+                download_url,
+            ]
+            encode_cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-i', 'pipe:0', *_MP3_ENCODE_ARGS, '-f', 'mp3', tmp_dst]
+
+            logger.info(f"Streaming audio from {platform} into MP3 encoder")
+            # yt-dlp's stderr goes to a file so neither process can block on a full pipe
+            with tempfile.TemporaryFile() as ytdlp_err:
+                ytdlp = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=ytdlp_err)
+                try:
+                    ffmpeg = subprocess.Popen(encode_cmd, stdin=ytdlp.stdout, stderr=subprocess.PIPE)
+                except Exception:
+                    ytdlp.kill()
+                    ytdlp.wait()
+                    raise
+                # Only ffmpeg holds the read end now, so yt-dlp stops if ffmpeg exits early
+                ytdlp.stdout.close()
+                try:
+                    _, ffmpeg_err = ffmpeg.communicate(timeout=_time_left(600))
+                    ytdlp.wait(timeout=_time_left(30))
+                except subprocess.TimeoutExpired:
+                    ffmpeg.kill()
+                    ytdlp.kill()
+                    ffmpeg.wait()
+                    ytdlp.wait()
+                    raise
+                ytdlp_err.seek(0)
+                ytdlp_stderr = ytdlp_err.read().decode(errors='replace')
+
+            # A download error is reported as is: retrying it on the disk path would only fail again.
+            # The exception is a broken pipe, which means ffmpeg gave up reading first.
+            ytdlp_failed = ytdlp.returncode != 0 or 'ERROR:' in ytdlp_stderr
+            if ytdlp_failed and not (ffmpeg.returncode != 0 and 'Broken pipe' in ytdlp_stderr):
+                if 'ERROR:' in ytdlp_stderr:
+                    raise RuntimeError(ytdlp_stderr.split('ERROR:', 1)[1].strip()[:500])
+                raise RuntimeError(ytdlp_stderr.strip()[-500:] or f'yt-dlp exited with code {ytdlp.returncode}')
+            if ffmpeg.returncode != 0:
+                logger.warning(f"Streaming MP3 encode failed, downloading to disk first: "
+                               f"{ffmpeg_err.decode(errors='replace').strip()[:500] or ffmpeg.returncode}")
+                return None
+
+            with open(name_file, 'r', encoding='utf-8') as f:
+                names = [line.strip() for line in f if line.strip()]
+            base_filename = names[-1] if names else 'audio__audio'
+            filename = f"{base_filename}.mp3"
+            filepath = os.path.join(self.base_dir, filename)
+            os.replace(tmp_dst, filepath)
+            file_size = os.stat(filepath).st_size
+        except subprocess.TimeoutExpired:
+            return {'success': False, 'error': 'Download timed out (>10 minutes)'}
+        except Exception as e:
+            return {'success': False, 'error': f'Download failed: {str(e)}'}
+        finally:
+            self._encode_slots.release()
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        # Title from the filename, as for downloads to disk
+        title = _OUTPUT_SUFFIX_RE.sub('', base_filename).replace('_', ' ')
+        logger.info(f"Streamed and encoded MP3: {filepath} ({file_size} bytes)")
+        return {
+            'success': True,
+            'title': title,
+            'filename': filename,
+            'filepath': filepath,
+            'file_size': self.format_file_size(file_size),
+            'download_url': f"/api/file/{filename}",
+            'platform': platform,
+            'media_type': 'audio',
+            'quality': 'MP3'
+        }
+
+    def _encode_mp3(self, download):
+        """Transcode a finished audio download to MP3 once an encode slot is free and point the result at the MP3."""
+        import subprocess
+
+        src = download['filepath']
+        base, ext = os.path.splitext(src)
+        if ext.lower() == '.mp3':
+            return download
+        dst = base + '.mp3'
+        filename = os.path.basename(dst)
+        # Encode into the temp dir and rename into place, so a half-written MP3 is never served
+        tmp_dst = os.path.join(self.temp_dir, filename)
+        cmd = ['ffmpeg', '-nostdin', '-y', '-loglevel', 'error', '-i', src, *_MP3_ENCODE_ARGS, tmp_dst]
+
+        try:
+            if not self._encode_slots.acquire(timeout=_time_left(None)):
+                raise RuntimeError('no encode slot became free in time')
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=_time_left(600))
+            finally:
+                self._encode_slots.release()
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip()[:500] or f'ffmpeg exited with code {result.returncode}')
+            os.replace(tmp_dst, dst)
+            file_size = os.stat(dst).st_size
+        except Exception as e:
+            logger.error(f"MP3 conversion failed for {src}: {e}")
+            for path in (tmp_dst, src):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return {'success': False, 'error': f'Audio conversion failed: {str(e)}'}
+
+        try:
+            os.remove(src)
+        except OSError as e:
+            logger.warning(f"Could not remove source audio {src}: {e}")
+
+        logger.info(f"Converted to MP3: {dst} ({file_size} bytes)")
+        download.update({
+            'filename': filename,
+            'filepath': dst,
+            'file_size': self.format_file_size(file_size),
+            'download_url': f"/api/file/{filename}",
+        })
+        return download
+
+    def _find_new_download(self, suffix, since):
+        """Find the newest file in base_dir ending with `suffix` (e.g. '__720') written at or after `since`."""
+        try:
+            with os.scandir(self.base_dir) as entries:
+                # DirEntry caches its stat result, so each candidate costs a single stat call
+                candidates = [
+                    (entry.stat().st_mtime, entry.path) for entry in entries
+                    if entry.is_file()
+                    and os.path.splitext(entry.name)[0].endswith(suffix)
+                    and not entry.name.endswith(('.part', '.ytdl'))
+                ]
+        except OSError as e:
+            logger.error(f"Could not scan download directory: {e}")
+            return None
+        newest = max((c for c in candidates if c[0] >= since), default=None)
+        return newest[1] if newest else None
+
+    def _process_download_result(self, result, platform, media_type, quality, filepath_info_file, started_at=None):
         """Process successful download result by reading the path from the info file."""
         try:
             found_filepath = None
+            file_size = None
             
-            # Read the exact filename from the info file created by yt-dlp
-            if filepath_info_file and os.path.exists(filepath_info_file):
+            # Read the exact filename from the info file created by yt-dlp.
+            # Open/stat directly rather than checking existence first: one syscall each, and no race.
+            lines = []
+            try:
                 with open(filepath_info_file, 'r', encoding='utf-8') as f:
                     # The file might contain multiple lines if yt-dlp is used on a playlist.
                     # We want the last non-empty line, which corresponds to the last downloaded file.
                     lines = f.read().strip().splitlines()
-                    if lines:
-                        last_path = lines[-1].strip()
-                        if os.path.exists(last_path):
-                            found_filepath = last_path
-                            logger.info(f"Found downloaded file path from info file: {found_filepath}")
-                        else:
-                            logger.error(f"File path '{last_path}' from info file does not exist.")
-            else:
+            except (TypeError, OSError):
                 logger.error("Could not find the filepath info file.")
+            if lines:
+                last_path = lines[-1].strip()
+                try:
+                    file_size = os.stat(last_path).st_size
+                    found_filepath = last_path
+                    logger.info(f"Found downloaded file path from info file: {found_filepath}")
+                except OSError:
+                    logger.error(f"File path '{last_path}' from info file does not exist.")
+
+            # Fall back to the file this run just wrote, matched by output-template suffix and mtime
+            if not found_filepath and started_at is not None:
+                suffix = '__audio' if media_type == 'audio' else f'__{quality}'
+                found_filepath = self._find_new_download(suffix, started_at)
+                if found_filepath:
+                    logger.info(f"Located downloaded file by modification time: {found_filepath}")
+                    file_size = os.stat(found_filepath).st_size
 
             if found_filepath:
                 filepath = found_filepath
@@ -1380,9 +2203,8 @@ class InvidiousDownloader:
                 base_filename = os.path.basename(filepath)
                 title_guess = os.path.splitext(base_filename)[0]
                 # Clean up suffix for a better title
-                title_guess = re.sub(r'__\w+$', '', title_guess).replace('_', ' ')
+                title_guess = _OUTPUT_SUFFIX_RE.sub('', title_guess).replace('_', ' ')
                 
-                file_size = os.path.getsize(filepath)
                 logger.info(f"File found: {filepath} ({file_size} bytes)")
 
                 # Add a size check to ensure it's not an empty/error file
@@ -1422,8 +2244,6 @@ class InvidiousDownloader:
     def _download_spotify(self, url, quality='192', media_type='audio'):
         """Download Spotify track using RapidAPI"""
         try:
-            import requests
-            
             # Check rate limit
             is_at_limit, remaining = spotify_rate_limiter.increment_and_check()
             
@@ -1435,7 +2255,7 @@ class InvidiousDownloader:
                     'error': 'Spotify rate limit reached (20 downloads per day)',
                     'rate_limit_hit': True,
                     'remaining_downloads': 0,
-                    'resets_at': f"{datetime.now().strftime('%Y-%m-%d')} 00:00:00 (next day)"
+                    'resets_at': f"{time.strftime('%Y-%m-%d')} 00:00:00 (next day)"
                 }
             
             # Get RapidAPI credentials
@@ -1457,7 +2277,7 @@ class InvidiousDownloader:
             api_url = f"https://{rapidapi_host}/downloadSong"
             params = {"songId": url}
             
-            response = requests.get(api_url, headers=headers, params=params, timeout=30)
+            response = self.session.get(api_url, headers=headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -1471,29 +2291,34 @@ class InvidiousDownloader:
                     if download_url:
                         logger.info(f"Got download URL: {download_url}")
                         
-                        # Download the file
-                        file_response = requests.get(download_url, timeout=60, headers={'User-Agent': 'Mozilla/5.0'})
+                        # Download the file, streaming it to disk instead of holding the whole track in memory
+                        file_response = self.session.get(download_url, timeout=60, headers={'User-Agent': 'Mozilla/5.0'}, stream=True)
                         
                         if file_response.status_code == 200:
                             # Save file
-                            import re
-                            filename_base = re.sub(r'[<>:"/\\|?*]', '_', f"{title} - {artist}")
+                            filename_base = _UNSAFE_FILENAME_RE.sub('_', f"{title} - {artist}")
                             filename = f"{filename_base}.mp3"
                             filepath = os.path.join(self.base_dir, filename)
                             
-                            with open(filepath, 'wb') as f:
-                                f.write(file_response.content)
+                            with file_response, open(filepath, 'wb') as f:
+                                _reserve_space(f, file_response.headers.get('Content-Length'))
+                                # Copy straight from the socket stream in large blocks, without
+                                # the per-chunk generator overhead of iter_content
+                                file_response.raw.decode_content = True
+                                shutil.copyfileobj(file_response.raw, f, DOWNLOAD_CHUNK_SIZE)
+                                # The position after the copy is the size; no stat needed afterwards
+                                file_size = f.tell()
+                                f.truncate()
                             
-                            file_size = os.path.getsize(filepath)
                             logger.info(f"Spotify track downloaded: {filepath} ({file_size} bytes)")
                             
                             return {
                                 'success': True,
                                 'title': f"{title} - {artist}",
-                                'filename': os.path.basename(filepath),
+                                'filename': filename,
                                 'filepath': filepath,
                                 'file_size': self.format_file_size(file_size),
-                                'download_url': f"/api/file/{os.path.basename(filepath)}",
+                                'download_url': f"/api/file/{filename}",
                                 'platform': 'spotify',
                                 'media_type': 'audio',
                                 'quality': 'MP3',
@@ -1521,28 +2346,18 @@ class InvidiousDownloader:
             return {'success': False, 'error': f'Failed to download Spotify track: {str(e)}'}
     
     def format_file_size(self, bytes_size):
+        try:
+            bytes_size = float(bytes_size)
+        except (TypeError, ValueError):
+            return "Unknown"
         if not bytes_size:
             return "Unknown"
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if bytes_size < 1024.0:
-                return f"{bytes_size:.2f} {unit}"
-            bytes_size /= 1024.0
-        return f"{bytes_size:.2f} TB"
+        # Each unit is 10 bits, so the unit index comes straight from the bit length
+        unit = max(0, min((int(bytes_size).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1))
+        return f"{bytes_size / (1 << (unit * 10)):.2f} {_SIZE_UNITS[unit]}"
     
     def detect_platform(self, url):
-        url_lower = url.lower()
-        if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-            return 'youtube'
-        elif 'tiktok.com' in url_lower:
-            return 'tiktok'
-        elif 'instagram.com' in url_lower:
-            return 'instagram'
-        elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-            return 'twitter'
-        elif 'spotify.com' in url_lower:
-            return 'spotify'
-        else:
-            return 'generic'
+        return _detect_platform(url)
 
 # Initialize the downloader
 downloader = InvidiousDownloader(base_dir=DOWNLOAD_DIR)
@@ -1605,10 +2420,13 @@ def index():
         'authenticated': is_authenticated(),
         'endpoints': {
             'analyze': '/api/analyze (POST)',
+            'analyze_playlist': '/api/analyze/playlist (POST)',
             'download': '/api/download (POST)',
+            'download_batch': '/api/download/batch (POST)',
             'platforms': '/api/platforms (GET)',
             'health': '/api/health (GET)',
             'admin_login': '/api/admin/login (POST)',
+            'admin_clear_cache': '/api/admin/cache/clear (POST)',
             'oauth_authorize': '/api/oauth2authorize (GET)',
             'oauth_callback': '/api/oauth2callback (GET)',
             'oauth_status': '/api/oauth2status (GET)',
@@ -1619,6 +2437,8 @@ def index():
 @app.route('/api/oauth2authorize')
 def authorize():
     """Start OAuth2 authorization flow by redirecting user to Google."""
+    import google_auth_oauthlib.flow
+
     try:
         if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
             raise Exception("Google OAuth credentials are not configured on the server.")
@@ -1660,6 +2480,8 @@ def authorize():
 @app.route('/api/oauth2callback')
 def oauth2callback():
     """OAuth2 callback endpoint for same-window redirect flow."""
+    import google_auth_oauthlib.flow
+
     frontend_url = "https://jaydl.onrender.com" if os.getenv('RENDER') == 'true' else "http://localhost:8000"
 
     try:
@@ -1731,6 +2553,8 @@ def oauth2callback():
 @app.route('/api/oauth2status')
 def oauth_status():
     """Check OAuth authentication status"""
+    from googleapiclient.discovery import build
+
     if is_authenticated():
         try:
             creds = get_user_credentials()
@@ -1781,6 +2605,8 @@ def oauth_logout():
 @app.route('/api/oauth2/setup-shared-account')
 def setup_shared_account():
     """Setup endpoint for shared account - use after authenticating with shared Gmail"""
+    from googleapiclient.discovery import build
+
     try:
         # This endpoint should only be called after user authenticates
         # It will store the OAuth credentials as shared credentials
@@ -1851,6 +2677,8 @@ def setup_shared_account():
 @app.route('/api/oauth2/shared-account-status')
 def shared_account_status():
     """Check if shared account is configured"""
+    from googleapiclient.discovery import build
+
     try:
         shared_creds = load_shared_credentials()
         
@@ -1920,7 +2748,7 @@ def analyze_media():
         user_credentials = get_user_credentials()
         
         logger.info(f"Analyzing URL: {url}")
-        result = downloader.get_video_info(url, user_credentials=user_credentials)
+        result = downloader.get_video_info(url, user_credentials=user_credentials, refresh=bool(data.get('refresh')))
         
         if result['success']:
             logger.info(f"Successfully analyzed: {result['title']}")
@@ -1936,6 +2764,33 @@ def analyze_media():
             'error': 'Server error. Please try again.'
         }), 500
 
+@app.route('/api/analyze/playlist', methods=['POST'])
+@limiter.limit("5 per minute")
+def analyze_playlist():
+    """List the videos in a playlist, optionally analyzing each one"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'No data received'}), 400
+
+        url = data.get('url')
+        if not url:
+            return jsonify({'success': False, 'error': 'URL is required'}), 400
+
+        if not url.startswith(('http://', 'https://')):
+            return jsonify({'success': False, 'error': 'Invalid URL format'}), 400
+
+        logger.info(f"Analyzing playlist: {url}")
+        result = downloader.get_playlist_info(url, user_credentials=get_user_credentials(), enrich=bool(data.get('enrich')))
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Error in analyze_playlist: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Server error. Please try again.'
+        }), 500
+
 @app.route('/api/download', methods=['POST'])
 @limiter.limit("10 per minute")
 def download_media():
@@ -1958,7 +2813,7 @@ def download_media():
             video_id = downloader._extract_video_id(url)
             if video_id:
                 # Re-analyze to get fresh URLs. This will try all API sources.
-                api_info = downloader.get_video_info(url, user_credentials=get_user_credentials())
+                api_info = downloader.get_video_info(url, user_credentials=get_user_credentials(), refresh=True)
                 
                 if api_info and api_info.get('success'):
                     # Find the specific format that was requested
@@ -1996,6 +2851,50 @@ def download_media():
             'error': f'Server error: {str(e)}'
         }), 500
 
+@app.route('/api/download/batch', methods=['POST'])
+@limiter.limit("2 per minute")
+def download_batch():
+    """Download several URLs concurrently"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'No data received'}), 400
+
+        urls = data.get('urls')
+        quality = data.get('quality', 'best')
+        media_type = data.get('media_type', 'video')
+
+        if not urls or not isinstance(urls, list):
+            return jsonify({'success': False, 'error': 'A list of URLs is required'}), 400
+        if len(urls) > BATCH_MAX_URLS:
+            return jsonify({'success': False, 'error': f'At most {BATCH_MAX_URLS} URLs can be downloaded at once'}), 400
+        if not all(isinstance(url, str) and url.startswith(('http://', 'https://')) for url in urls):
+            return jsonify({'success': False, 'error': 'Invalid URL format'}), 400
+
+        logger.info(f"Batch downloading {len(urls)} URLs | Quality: {quality} | Type: {media_type}")
+        results = downloader.download_batch(urls, quality=quality, media_type=media_type,
+                                            user_credentials=get_user_credentials())
+
+        completed = sum(1 for result in results if result.get('success'))
+        logger.info(f"Batch download finished: {completed}/{len(urls)} succeeded")
+
+        response = {
+            'success': completed > 0,
+            'completed': completed,
+            'total': len(urls),
+            'results': results
+        }
+        if not completed:
+            response['error'] = 'All downloads in the batch failed'
+        return jsonify(response)
+
+    except Exception as e:
+        logger.error(f"Error in download_batch: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Server error: {str(e)}'
+        }), 500
+
 class FileRemover:
     def __init__(self, path):
         self.path = path
@@ -2021,11 +2920,12 @@ def serve_file(filename):
     try:
         filepath = os.path.join(DOWNLOAD_DIR, filename)
         
-        if not os.path.exists(filepath):
+        # Opening directly is one syscall and can't race with cleanup the way exists()+open() can
+        try:
+            file_remover = FileRemover(filepath)
+        except FileNotFoundError:
             logger.error(f"File not found at path: {filepath}")
             return jsonify({'success': False, 'error': 'File not found'}), 404
-
-        file_remover = FileRemover(filepath)
         
         return send_file(
             file_remover,
@@ -2287,6 +3187,11 @@ def health_check():
         'session_active': is_authenticated()
     })
 
+def is_admin_password(password):
+    # IMPORTANT: This is a hardcoded password as requested.
+    # In a real app, use a securely hashed password from environment variables.
+    return password == 'smprime123'
+
 @app.route('/api/admin/login', methods=['POST'])
 def admin_login():
     """Validate admin password."""
@@ -2294,15 +3199,25 @@ def admin_login():
     if not data:
         return jsonify({'success': False, 'error': 'No data received'}), 400
 
-    password = data.get('password')
-
-    # IMPORTANT: This is a hardcoded password as requested.
-    # In a real app, use a securely hashed password from environment variables.
-    if password == 'smprime123':
+    if is_admin_password(data.get('password')):
         return jsonify({'success': True, 'message': 'Admin login successful'})
     else:
         return jsonify({'success': False, 'error': 'Invalid password'}), 401
 
+@app.route('/api/admin/cache/clear', methods=['POST'])
+@limiter.limit("5 per minute")
+def admin_clear_cache():
+    """Drop every cached video analysis (admin only)"""
+    data = request.get_json()
+    if not data:
+        return jsonify({'success': False, 'error': 'No data received'}), 400
+
+    if not is_admin_password(data.get('password')):
+        return jsonify({'success': False, 'error': 'Invalid password'}), 401
+
+    removed = downloader.clear_info_cache()
+    return jsonify({'success': True, 'removed': removed})
+
 @app.route('/api/debug/oauth', methods=['GET'])
 def debug_oauth():
     """Debug OAuth configuration (development only)"""
@@ -2323,30 +3238,44 @@ def cleanup_old_files_background():
             # Sleep for 30 minutes before cleaning
             time.sleep(1800)
             
-            if not os.path.exists(DOWNLOAD_DIR):
-                continue
-            
-            current_time = datetime.now().timestamp()
+            current_time = time.time()
             cleaned_count = 0
             
-            for filename in os.listdir(DOWNLOAD_DIR):
+            # scandir gets the file type from the directory listing itself, and each entry
+            # caches its stat, so every file costs at most one stat call. The yt-dlp temp
+            # directory is included so partial files from failed downloads are removed too.
+            entries = []
+            for directory in (DOWNLOAD_DIR, downloader.temp_dir):
+                try:
+                    entries.extend(os.scandir(directory))
+                except FileNotFoundError:
+                    pass
+            
+            for entry in entries:
+                filename = entry.name
                 try:
-                    filepath = os.path.join(DOWNLOAD_DIR, filename)
+                    # Skip hidden files
+                    if filename.startswith('.'):
+                        continue
                     
-                    # Skip if not a file
-                    if not os.path.isfile(filepath):
+                    # Per-download work directories are removed by their download; one this old
+                    # was left behind by a worker that died mid-download
+                    if (entry.is_dir(follow_symlinks=False) and os.path.dirname(entry.path) == downloader.temp_dir
+                            and current_time - entry.stat().st_mtime > 7200):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                        cleaned_count += 1
                         continue
                     
-                    # Skip hidden files
-                    if filename.startswith('.'):
+                    # Skip if not a file
+                    if not entry.is_file(follow_symlinks=False):
                         continue
                     
                     # Check file age (clean up files older than 2 hours)
-                    file_age = current_time - os.path.getmtime(filepath)
+                    file_age = current_time - entry.stat().st_mtime
                     
                     # Delete if older than 2 hours
                     if file_age > 7200:
-                        os.remove(filepath)
+                        os.remove(entry.path)
                         cleaned_count += 1
                         logger.info(f"Cleaned up old file: {filename}")
                 except Exception as e:
@@ -2354,6 +3283,10 @@ def cleanup_old_files_background():
             
             if cleaned_count > 0:
                 logger.info(f"Cleanup completed: removed {cleaned_count} old files")
+
+            pruned_count = downloader.prune_info_cache()
+            if pruned_count > 0:
+                logger.info(f"Pruned {pruned_count} entries from the info cache")
         except Exception as e:
             logger.error(f"Error in cleanup loop: {str(e)}")
 
@@ -2368,16 +3301,18 @@ except Exception as e:
 
 # Install required packages if not present
 def check_dependencies():
-    try:
-        import google_auth_oauthlib
-        import googleapiclient
+    # The OAuth libraries are imported lazily by the OAuth routes, so only check that they
+    # can be found here instead of paying their import cost on every worker start
+    if all(importlib.util.find_spec(name) for name in ('google_auth_oauthlib', 'googleapiclient')):
         logger.info("OAuth dependencies are installed")
-    except ImportError:
+    else:
         logger.warning("Some OAuth dependencies may not be installed. Run: pip install google-auth-oauthlib google-auth-httplib2 google-api-python-client")
 
 check_dependencies()
 
-# Update yt-dlp on startup to get latest fixes
+# Update yt-dlp to get the latest extractor fixes. Deployments upgrade it in the build step;
+# a local `python app.py` upgrades it here before serving. Never done by a serving worker,
+# where requests would spawn yt-dlp while pip replaces its files.
 def update_yt_dlp():
     """Attempt to update yt-dlp to the latest version using pip."""
     import subprocess
@@ -2399,7 +3334,20 @@ def update_yt_dlp():
     except Exception as e:
         logger.error(f"An error occurred during yt-dlp update: {e}")
 
-update_yt_dlp()
+def warm_yt_dlp():
+    """
+    Run yt-dlp once so its modules and extractor registry are already in the page cache (and
+    bytecode compiled) when the first real request spawns it. Runs in the background so worker
+    startup doesn't wait on it.
+    """
+    import subprocess
+    try:
+        subprocess.run(['yt-dlp', '--version'], capture_output=True, timeout=60)
+        logger.info("yt-dlp warmed up")
+    except Exception as e:
+        logger.warning(f"yt-dlp warm-up failed: {e}")
+
+threading.Thread(target=warm_yt_dlp, name='yt-dlp-warmup', daemon=True).start()
 
 if __name__ == '__main__':
     # Get port from environment variable or default to 5000
@@ -2410,5 +3358,6 @@ if __name__ == '__main__':
     logger.info(f"Debug mode: {debug}")
     logger.info(f"Download directory: {DOWNLOAD_DIR}")
     logger.info(f"OAuth configured: {bool(GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET)}")
-    
+
+    update_yt_dlp()
     app.run(debug=debug, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -1,7 +1,12 @@
 import http.server
-import socketserver
+import io
 import os
+import shutil
+import stat
 import sys
+import threading
+from collections import OrderedDict
+from functools import partial
 
 # Set port - use 8000 by default for local development
 # Note: Explicitly use 8000 to avoid conflicts with backend on 5000
@@ -12,23 +17,109 @@ if 'FRONTEND_PORT' in os.environ:
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Bytes of recently served files, keyed by path and validated against (mtime_ns, size),
+# so each version of a file is read from disk once. Large files are streamed instead.
+CACHE_MAX_ENTRIES = 64
+CACHE_MAX_FILE_SIZE = 1 << 20
+CACHE_CONTROL = 'public, max-age=60'
+_file_cache = OrderedDict()
+_file_cache_lock = threading.Lock()
+
+def _read_cached(path, st):
+    version = (st.st_mtime_ns, st.st_size)
+    with _file_cache_lock:
+        hit = _file_cache.get(path)
+        if hit and hit[0] == version:
+            _file_cache.move_to_end(path)
+            return hit[1]
+    with open(path, 'rb') as f:
+        body = f.read()
+    with _file_cache_lock:
+        _file_cache[path] = (version, body)
+        _file_cache.move_to_end(path)
+        while len(_file_cache) > CACHE_MAX_ENTRIES:
+            _file_cache.popitem(last=False)
+    return body
+
 class Handler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory=SCRIPT_DIR, **kwargs)
+    # HTTP/1.1 keeps the connection open, so a page and its assets load over one socket.
+    # Idle keep-alive connections are closed after `timeout` seconds to free their thread.
+    protocol_version = "HTTP/1.1"
+    timeout = 30
+
+    def __init__(self, *args, directory=SCRIPT_DIR, **kwargs):
+        super().__init__(*args, directory=directory, **kwargs)
     
     def log_message(self, format, *args):
         """Override to print to stdout"""
         print(f"[Frontend] {format % args}", flush=True)
 
-def start_server():
+    def send_head(self):
+        """
+        Serve regular files with an ETag and Cache-Control, answering 304 when the browser's
+        copy is current. Directory listings, redirects and errors are left to the base class.
+        """
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split('?', 1)[0].split('#', 1)[0].endswith('/'):
+                return super().send_head()
+            for index in ('index.html', 'index.htm'):
+                if os.path.isfile(os.path.join(path, index)):
+                    path = os.path.join(path, index)
+                    break
+            else:
+                return super().send_head()
+        elif path.endswith('/'):
+            return super().send_head()
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            return super().send_head()
+        if not stat.S_ISREG(st.st_mode):
+            return super().send_head()
+
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in (t.strip() for t in if_none_match.split(','))):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', CACHE_CONTROL)
+            self.end_headers()
+            return None
+
+        try:
+            if st.st_size <= CACHE_MAX_FILE_SIZE:
+                body = io.BytesIO(_read_cached(path, st))
+            else:
+                body = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        self.send_response(200)
+        self.send_header('Content-type', self.guess_type(path))
+        self.send_header('Content-Length', str(st.st_size))
+        self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', CACHE_CONTROL)
+        self.end_headers()
+        return body
+
+    def copyfile(self, source, outputfile):
+        shutil.copyfileobj(source, outputfile, 1 << 20)
+
+def start_server(port=None, directory=None):
+    """Serve `directory` (default: this script's directory) on `port` (default: PORT)"""
+    port = PORT if port is None else port
+    handler = partial(Handler, directory=directory or SCRIPT_DIR)
     try:
-        handler = Handler
-        with socketserver.TCPServer(("", PORT), handler) as httpd:
-            print(f"Frontend server running on http://localhost:{PORT}", flush=True)
+        with http.server.ThreadingHTTPServer(("", port), handler) as httpd:
+            print(f"Frontend server running on http://localhost:{port}", flush=True)
             sys.stdout.flush()
             httpd.serve_forever()
     except OSError as e:
-        print(f"Error: Failed to start server on port {PORT}: {e}", file=sys.stderr, flush=True)
+        print(f"Error: Failed to start server on port {port}: {e}", file=sys.stderr, flush=True)
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr, flush=True)
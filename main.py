@@ -4,59 +4,124 @@ JayDL Main Launcher - Starts both backend and frontend servers
 Run this file to start the entire application
 """
 
+import hashlib
 import subprocess
 import sys
 import os
+import re
 import time
+import selectors
 import signal
+import socket
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Fix encoding for Windows console
-if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+if sys.platform == 'win32' and hasattr(sys.stdout, 'reconfigure') and (sys.stdout.encoding or '').lower() != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+
+ROOT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = ROOT_DIR / 'backend'
+FRONTEND_DIR = ROOT_DIR / 'frontend'
+CHATBOT_DIR = ROOT_DIR / 'chatbot'
 
 # Load environment variables
-load_dotenv(os.path.join(os.path.dirname(__file__), 'backend', '.env'))
+load_dotenv(BACKEND_DIR / '.env')
+
+# KEY=value lines of a .env file; comment lines never match since keys can't start with '#'
+_ENV_LINE_RE = re.compile(r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t]*$', re.M)
 
 class JayDLLauncher:
+    # Command lines for each service, run from its own directory
+    BACKEND_ARGV = (sys.executable, 'app.py')
+    FRONTEND_ARGV = (sys.executable, 'local-server.py')
+    CHATBOT_ARGV = ('node', 'server.js')
+
     def __init__(self):
-        self.root_dir = Path(__file__).parent
-        self.backend_dir = self.root_dir / 'backend'
-        self.frontend_dir = self.root_dir / 'frontend'
-        self.chatbot_dir = self.root_dir / 'chatbot'
+        self.root_dir = ROOT_DIR
+        self.backend_dir = BACKEND_DIR
+        self.frontend_dir = FRONTEND_DIR
+        self.chatbot_dir = CHATBOT_DIR
         self.processes = []
-        self.monitor_threads = []
+        self.output_buffers = {}
+        self.service_ports = {}
+        self.selector = selectors.DefaultSelector() if sys.platform != 'win32' else None
+        # Set when a child couldn't get a pidfd, so run() falls back to polling exits every second
+        self.poll_for_exits = not hasattr(os, 'pidfd_open')
     
+    def _drain_output(self, name, stream):
+        """
+        Print the complete lines from one read of a child's output; returns False at EOF.
+        Whatever the pipe has is taken in one large os.read() on the raw fd (the pipes are
+        unbuffered, so there is no io layer in between) and split in memory; a trailing
+        partial line waits for the next chunk.
+        """
+        buf = self.output_buffers.setdefault(name, bytearray())
+        try:
+            data = os.read(stream.fileno(), 65536)
+        except (OSError, ValueError):
+            data = b''
+        if data:
+            buf.extend(data)
+            *lines, rest = buf.split(b'\n')
+            self.output_buffers[name] = bytearray(rest)
+        else:
+            lines = [buf] if buf else []
+            self.output_buffers.pop(name, None)
+        if lines:
+            # All lines from this read go out as one prefixed block in a single write, straight
+            # to the byte buffer; the text layer is flushed first so launcher messages stay in order
+            prefix = f"[{name}] ".encode()
+            sys.stdout.flush()
+            sys.stdout.buffer.write(b''.join(prefix + line.rstrip() + b'\n' for line in lines))
+            sys.stdout.buffer.flush()
+        return bool(data)
+
     def monitor_process_output(self, name, process):
         """Monitor and display output from a process"""
-        try:
-            for line in iter(process.stdout.readline, ''):
-                if line:
-                    try:
-                        print(f"[{name}] {line.rstrip()}")
-                    except UnicodeDecodeError:
-                        # Handle encoding issues gracefully
-                        print(f"[{name}] (output encoding issue - process is running)")
-                    sys.stdout.flush()
-        except Exception as e:
-            # Don't print error for normal process termination
+        while self._drain_output(name, process.stdout):
             pass
-        
+
+    def watch_process_output(self, name, process):
+        """
+        Relay a child's output. On POSIX all children share one selector that the supervisor
+        loop in run() waits on; Windows can't select() on pipes, so there each gets a thread.
+        """
+        if self.selector is not None:
+            self.selector.register(process.stdout, selectors.EVENT_READ, data=name)
+            self.watch_process_exit(name, process)
+        else:
+            threading.Thread(target=self.monitor_process_output, args=(name, process), daemon=True).start()
+
+    def relay_output(self, timeout):
+        """Wait up to `timeout` seconds (None: indefinitely) for children to write or exit, relaying what they wrote"""
+        for key, _ in self.selector.select(timeout=timeout):
+            if isinstance(key.data, tuple):
+                # Exited; the supervisor loop's poll() reaps and reports it
+                self.selector.unregister(key.fileobj)
+                os.close(key.fileobj)
+            elif not self._drain_output(key.data, key.fileobj):
+                self.selector.unregister(key.fileobj)
+
+    def watch_process_exit(self, name, process):
+        """Register a pidfd (Linux 5.3+) that becomes readable when the child exits"""
+        if self.poll_for_exits:
+            return
+        try:
+            fd = os.pidfd_open(process.pid)
+        except OSError:
+            self.poll_for_exits = True
+            return
+        self.selector.register(fd, selectors.EVENT_READ, data=('exit', name))
+
     def check_dependencies(self):
         """Check if all required dependencies are available"""
         print("🔍 Checking dependencies...")
         
         # Check Python
-        try:
-            import_result = subprocess.run([sys.executable, '--version'], 
-                                          capture_output=True, text=True)
-            print(f"✅ Python {import_result.stdout.strip()}")
-        except Exception as e:
-            print(f"❌ Python check failed: {e}")
-            return False
+        print(f"✅ Python {sys.version.split()[0]}")
         
         # Check .env file
         env_file = self.backend_dir / '.env'
@@ -64,8 +129,7 @@ class JayDLLauncher:
             env_example = self.backend_dir / '.env.example'
             if env_example.exists():
                 print("⚠️  .env file not found. Copying from .env.example...")
-                import shutil
-                shutil.copy(env_example, env_file)
+                env_file.write_bytes(env_example.read_bytes())
                 print("📝 IMPORTANT: An environment file has been created at 'backend/.env'.")
                 print("   You MUST edit this file and add your secrets before running again.")
                 print("   - Add your 'RAPIDAPI_SPOTIFY_KEY'.")
@@ -84,16 +148,24 @@ class JayDLLauncher:
         try:
             requirements_file = self.backend_dir / 'requirements.txt'
             if requirements_file.exists():
+                # Skip pip when these requirements were already installed into this interpreter
+                hash_file = self.backend_dir / '.requirements.hash'
+                digest = hashlib.blake2b(requirements_file.read_bytes() + os.fsencode(sys.executable)).hexdigest()
+                if hash_file.exists() and hash_file.read_text().strip() == digest:
+                    print("✅ Dependencies up to date")
+                    return True
                 result = subprocess.run(
                     [sys.executable, '-m', 'pip', 'install', '-q', '-r', str(requirements_file)],
-                    capture_output=True,
-                    text=True
+                    # Only stderr is reported (on failure), so stdout goes straight to /dev/null
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE
                 )
                 if result.returncode == 0:
+                    hash_file.write_text(digest)
                     print("✅ Dependencies installed successfully")
                     return True
                 else:
-                    print(f"❌ Failed to install dependencies: {result.stderr}")
+                    print(f"❌ Failed to install dependencies: {result.stderr.decode(errors='replace')}")
                     return False
             else:
                 print("❌ requirements.txt not found")
@@ -114,24 +186,17 @@ class JayDLLauncher:
         try:
             # Start Flask app
             process = subprocess.Popen(
-                [sys.executable, 'app.py'],
+                self.BACKEND_ARGV,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
+                bufsize=0,
                 cwd=str(self.backend_dir)
             )
             
             self.processes.append(('backend', process))
             
-            # Start monitoring thread
-            monitor_thread = threading.Thread(
-                target=self.monitor_process_output,
-                args=('backend', process),
-                daemon=True
-            )
-            monitor_thread.start()
-            self.monitor_threads.append(monitor_thread)
+            self.watch_process_output('backend', process)
+            self.service_ports['backend'] = int(os.environ.get('PORT', 5000))
             
             print(f"✅ Backend started (PID: {process.pid})")
             return True
@@ -145,24 +210,17 @@ class JayDLLauncher:
         try:
             # Start frontend server
             process = subprocess.Popen(
-                [sys.executable, 'local-server.py'],
+                self.FRONTEND_ARGV,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
+                bufsize=0,
                 cwd=str(self.frontend_dir)
             )
             
             self.processes.append(('frontend', process))
             
-            # Start monitoring thread
-            monitor_thread = threading.Thread(
-                target=self.monitor_process_output,
-                args=('frontend', process),
-                daemon=True
-            )
-            monitor_thread.start()
-            self.monitor_threads.append(monitor_thread)
+            self.watch_process_output('frontend', process)
+            self.service_ports['frontend'] = int(os.environ.get('FRONTEND_PORT', 8000))
             
             print(f"✅ Frontend started (PID: {process.pid})")
             return True
@@ -186,53 +244,42 @@ class JayDLLauncher:
                 result = subprocess.run(
                     ['npm', 'install'],
                     cwd=str(self.chatbot_dir),
-                    capture_output=True,
-                    text=True
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE
                 )
                 if result.returncode != 0:
                     print("⚠️  Warning: Failed to install chatbot dependencies")
-                    print(f"   Error: {result.stderr}")
+                    print(f"   Error: {result.stderr.decode(errors='replace')}")
                     print("   Make sure Node.js is installed: https://nodejs.org/")
                     return True  # Don't fail, continue without chatbot
                 print("✅ Chatbot dependencies installed")
             
             # Start chatbot server using node directly with better environment
             # Load chatbot .env variables
-            chatbot_env = os.environ.copy()
+            # The child inherits our environment as-is unless chatbot/.env adds to it
+            chatbot_env = None
             chatbot_env_file = self.chatbot_dir / '.env'
             if chatbot_env_file.exists():
-                with open(chatbot_env_file, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#') and '=' in line:
-                            key, value = line.split('=', 1)
-                            chatbot_env[key.strip()] = value.strip()
+                overrides = dict(_ENV_LINE_RE.findall(chatbot_env_file.read_text()))
+                if overrides:
+                    chatbot_env = {**os.environ, **overrides}
             
             process = subprocess.Popen(
-                ['node', 'server.js'],
+                self.CHATBOT_ARGV,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
+                bufsize=0,
                 cwd=str(self.chatbot_dir),
                 env=chatbot_env
             )
             
             self.processes.append(('chatbot', process))
             
-            # Start monitoring thread
-            monitor_thread = threading.Thread(
-                target=self.monitor_process_output,
-                args=('chatbot', process),
-                daemon=True
-            )
-            monitor_thread.start()
-            self.monitor_threads.append(monitor_thread)
+            self.watch_process_output('chatbot', process)
             
-            print(f"✅ Chatbot started (PID: {process.pid})")
+            self.service_ports['chatbot'] = int((chatbot_env or os.environ).get('PORT', 3000))
             
-            # Give chatbot a moment to start
-            time.sleep(1)
+            print(f"✅ Chatbot started (PID: {process.pid})")
             return True
         except FileNotFoundError as e:
             print(f"⚠️  Node.js not found. Chatbot requires Node.js to run.")
@@ -245,6 +292,32 @@ class JayDLLauncher:
             traceback.print_exc()
             return True  # Don't fail completely
     
+    def wait_for_port(self, port, process, timeout=10.0):
+        """Wait until something accepts connections on localhost:`port`; gives up early if `process` exits"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and process.poll() is None:
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.05):
+                    return True
+            except OSError:
+                time.sleep(0.05)
+        return False
+
+    def wait_until_ready(self):
+        """Probe every started service's port in parallel, relaying their startup output meanwhile"""
+        services = [(name, process) for name, process in self.processes if name in self.service_ports]
+        if not services:
+            return
+        with ThreadPoolExecutor(max_workers=len(services)) as pool:
+            futures = [pool.submit(self.wait_for_port, self.service_ports[name], process) for name, process in services]
+            # On POSIX only the selector relays output, so it is drained here too: startup logs and
+            # tracebacks show up as they happen, and no child blocks on a full pipe
+            while self.selector is not None and not all(future.done() for future in futures):
+                self.relay_output(timeout=0.05)
+            for (name, _), future in zip(services, futures):
+                if not future.result():
+                    print(f"⚠️  {name} is not accepting connections on port {self.service_ports[name]} yet")
+
     def print_status(self):
         """Print the application status"""
         print("\n" + "="*50)
@@ -309,23 +382,20 @@ class JayDLLauncher:
         # Create downloads directory
         self.create_downloads_dir()
         
-        # Start servers
+        # Start servers. They don't depend on each other, so all are spawned first and
+        # then waited on together until they accept connections.
         if not self.start_backend():
             return False
         
-        # Wait a bit for backend to initialize
-        time.sleep(2)
-        
         if not self.start_frontend():
             self.stop_all()
             return False
         
-        # Wait a bit for frontend to initialize
-        time.sleep(1)
-        
         # Start chatbot (optional, doesn't fail if it doesn't work)
         self.start_chatbot()
         
+        self.wait_until_ready()
+        
         # Print status
         self.print_status()
         
@@ -352,7 +422,12 @@ class JayDLLauncher:
                     self.stop_all()
                     return False
                 
-                time.sleep(1)
+                if self.selector is None:
+                    time.sleep(1)
+                    continue
+                # Sleep until a child writes or exits. With pidfds for every child there is
+                # nothing to poll, so no timeout is needed.
+                self.relay_output(timeout=1.0 if self.poll_for_exits else None)
         except KeyboardInterrupt:
             self.handle_shutdown(None, None)
         
@@ -1,19 +1,30 @@
 import requests
 import time
-import schedule
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+PING_INTERVAL = 5 * 60  # seconds
+
+# Reused across pings so the TLS connection is kept alive while the server allows it.
+# A failed ping (e.g. the backend still waking up) gets two quick retries.
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(max_retries=Retry(total=2, backoff_factor=0.3)))
 
 def ping_backend():
     try:
-        response = requests.get('https://jaydl-backend.onrender.com/ping', timeout=10)
+        response = _session.get('https://jaydl-backend.onrender.com/ping', timeout=10)
         print(f"Ping successful: {response.status_code}")
     except Exception as e:
         print(f"Ping failed: {e}")
 
-# Schedule pings every 5 minutes
-schedule.every(5).minutes.do(ping_backend)
+def run_scheduler():
+    """Ping every PING_INTERVAL seconds, sleeping until each deadline instead of waking every second"""
+    next_ping = time.monotonic() + PING_INTERVAL
+    while True:
+        time.sleep(max(0, next_ping - time.monotonic()))
+        ping_backend()
+        next_ping += PING_INTERVAL
 
 if __name__ == "__main__":
     print("Starting ping service...")
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+    run_scheduler()
\ No newline at end of file
@@ -1,19 +1,23 @@
 import requests
 import json
 import sys
-import io
 
-if sys.stdout.encoding != 'utf-8':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+if hasattr(sys.stdout, 'reconfigure') and (sys.stdout.encoding or '').lower() != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
-url = 'http://localhost:5000/api/analyze'
+BASE_URL = 'http://localhost:5000'
+
+# One session for every check, so they share a kept-alive connection to the backend
+session = requests.Session()
+
+url = f'{BASE_URL}/api/analyze'
 payload = {'url': 'https://www.youtube.com/watch?v=z19HM7ANZlo'}
 
 print('Testing /api/analyze endpoint...')
 print('=' * 60)
 
 try:
-    response = requests.post(url, json=payload, timeout=30)
+    response = session.post(url, json=payload, timeout=30)
     print(f'Status: {response.status_code}')
     data = response.json()
     
@@ -33,8 +37,8 @@ print('\nTesting /api/oauth2/shared-account-status endpoint...')
 print('=' * 60)
 
 try:
-    url = 'http://localhost:5000/api/oauth2/shared-account-status'
-    response = requests.get(url, timeout=30)
+    url = f'{BASE_URL}/api/oauth2/shared-account-status'
+    response = session.get(url, timeout=30)
     print(f'Status: {response.status_code}')
     data = response.json()
     
@@ -48,3 +52,27 @@ try:
         print(f'   Response: {data}')
 except Exception as e:
     print(f'Error: {str(e)}')
+
+print('\nTesting /api/admin/cache/clear endpoint...')
+print('=' * 60)
+
+try:
+    url = f'{BASE_URL}/api/admin/cache/clear'
+    response = session.post(url, json={'password': 'wrong'}, timeout=30)
+    if response.status_code == 401:
+        print('✅ Wrong password rejected')
+    else:
+        print(f'❌ Wrong password not rejected: {response.status_code}')
+
+    response = session.post(url, json={'password': 'smprime123'}, timeout=30)
+    print(f'Status: {response.status_code}')
+    data = response.json()
+
+    if data.get('success'):
+        print('✅ SUCCESS!')
+        print(f'   Cache entries removed: {data.get("removed")}')
+    else:
+        print(f'❌ Failed: {data.get("error")}')
+        print(f'   Response: {data}')
+except Exception as e:
+    print(f'Error: {str(e)}')